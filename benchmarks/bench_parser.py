@@ -0,0 +1,231 @@
+"""
+Benchmark for the TimeGuessr message parser.
+
+Builds a synthetic corpus (see synthetic_chat.py), then times parse_game_posts over it
+and reports throughput. The pre-single-pass parser is kept below as a baseline: it is timed
+on the same corpus and its results are checked against the current parser.
+
+With --workers N the corpus is also written to a temporary post store and parsed both in one
+process and sharded across N processes; the selected score records must be identical.
+
+With --channels K the corpus is dealt out over K channel stores, and the streaming k-way merge
+(update_merged_channel_scores) is compared with loading every channel, sorting the lot and then
+parsing it: the selected scores must be identical, and the peak traced memory of both is reported.
+
+    python benchmarks/bench_parser.py --messages 2000000 --match-ratio 0.05
+    python benchmarks/bench_parser.py --messages 2000000 --workers 4
+    python benchmarks/bench_parser.py --messages 500000 --channels 3 --skip-legacy
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import newGenerateDashboard as dashboard
+from synthetic_chat import synthetic_posts, describe_span
+
+LEGACY_TIMEGUESSR_REGEX = re.compile(r"TimeGuessr #\d{3,4} \d{1,2},\d{3}/50,000")
+
+
+def legacy_get_emoji_score(emojis):
+    return emojis.count('🟩') * 2 + emojis.count('🟨') * 1
+
+
+def legacy_parse_timeguessr_post(post):
+    """The multi-pass parser the single-pass one replaced, kept as a baseline."""
+    message = post.get("message") or ""
+    if not LEGACY_TIMEGUESSR_REGEX.search(message):
+        return None
+    score_match = re.search(r'([\d,]+)/50,000', message)
+    if not all([post.get("creator_id"), score_match]):
+        return None
+    rounds = []
+    for line in message.split('\n'):
+        if not line.strip().startswith('🌎'): continue
+        round_match = re.search(r'🌎(.*?)\s+📅(.*)', line.strip())
+        if round_match:
+            loc = round_match.group(1).strip().replace('\ufe0f', '')
+            date_emojis = round_match.group(2).strip().replace('\ufe0f', '')
+            if len(loc) == 3 and len(date_emojis) == 3:
+                rounds.append({"location_score": legacy_get_emoji_score(loc), "date_score": legacy_get_emoji_score(date_emojis)})
+    if len(rounds) != 5:
+        return None
+    return {"post_id": post.get("post_id"), "total_score": int(score_match.group(1).replace(',', '')), "rounds": rounds}
+
+
+def legacy_parse_timeguessr_posts(posts):
+    return [record for record in map(legacy_parse_timeguessr_post, posts) if record is not None]
+
+
+def time_parser(parse_batch, posts, repeat):
+    """Returns (best seconds, number of valid results) over `repeat` passes."""
+    best, found = None, 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = len(parse_batch(posts))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, found
+
+
+def check_against_legacy(posts):
+    """Returns the number of posts where the current and legacy parsers disagree."""
+    mismatches = 0
+    timeguessr = dashboard.GAMES["timeguessr"]
+    for post in posts:
+        current, legacy = dashboard.parse_game_post(timeguessr, dashboard.make_post(post)), legacy_parse_timeguessr_post(post)
+        if current is None or legacy is None:
+            mismatches += (current is None) != (legacy is None)
+            continue
+        if (current["total_score"], current["rounds"]) != (legacy["total_score"], legacy["rounds"]):
+            mismatches += 1
+    return mismatches
+
+
+def select_records(parsed):
+    """Applies the first-score-of-the-day rule the same way merge_score_records does."""
+    parsed = sorted(parsed, key=lambda pair: (pair[0], pair[1]["post_id"]))
+    return [record for _, record in dashboard.iter_first_scores_of_day(parsed)]
+
+
+def check_workers(posts, workers):
+    """
+    Parses the corpus from a post store in one process and with `workers` processes.
+    Returns (single seconds, sharded seconds, identical?).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        store = dashboard.sqlite3.connect(os.path.join(tmp, "bench_store.sqlite3"))
+        store.executescript(dashboard.POST_STORE_SCHEMA)
+        dashboard.append_posts(store, posts)
+
+        start = time.perf_counter()
+        single = select_records(dashboard.parse_stored_posts(store))
+        single_seconds = time.perf_counter() - start
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            start = time.perf_counter()
+            sharded = select_records(dashboard.parse_stored_posts(store, executor=executor))
+            sharded_seconds = time.perf_counter() - start
+        store.close()
+    return single_seconds, sharded_seconds, single == sharded
+
+
+def traced(func, *args):
+    """Returns (result, seconds, peak traced bytes) of func(*args)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func(*args)
+        return result, time.perf_counter() - start, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def check_channel_merge(posts, channels):
+    """
+    Deals the corpus out over `channels` stores, then selects the scores by streaming a k-way merge of
+    the stores and by loading and sorting everything first. Returns the two timings, the two peak
+    memory figures and whether the selected scores are identical.
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            stores = {}
+            for channel_id in range(1, channels + 1):
+                stores[channel_id] = dashboard.open_post_store(channel_id)
+                dashboard.append_posts(stores[channel_id], posts[channel_id - 1::channels])
+
+            def streamed():
+                state = dashboard.open_score_state(rebuild=True)
+                dashboard.update_merged_channel_scores(state, stores)
+                rows = state.execute("SELECT creator_id, game_date, post_id FROM scores ORDER BY creator_id, game_date").fetchall()
+                state.close()
+                return rows
+
+            def load_all_and_sort():
+                all_posts = []
+                for store in stores.values():
+                    all_posts.extend(dashboard.iter_stored_posts(store))
+                all_posts.sort(key=dashboard.get_post_order)
+                selected = list(dashboard.iter_first_scores_of_day(dashboard.parse_game_posts(all_posts)))
+                return sorted((r["creator_id"], r["datetime"].split('T')[0], r["post_id"]) for _, r in selected)
+
+            merged_rows, merged_seconds, merged_peak = traced(streamed)
+            sorted_rows, sorted_seconds, sorted_peak = traced(load_all_and_sort)
+            for store in stores.values():
+                store.close()
+        finally:
+            os.chdir(cwd)
+    return merged_seconds, sorted_seconds, merged_peak, sorted_peak, merged_rows == sorted_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the TimeGuessr message parser on a synthetic corpus.")
+    parser.add_argument("--messages", type=int, default=1_000_000, help="Number of synthetic chat messages.")
+    parser.add_argument("--match-ratio", type=float, default=0.05, help="Fraction of messages that are TimeGuessr shares.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per parser; the best one is reported.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic corpus.")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the current parser.")
+    parser.add_argument("--workers", type=int, default=0, help="Also compare single-process and N-process parsing of a post store.")
+    parser.add_argument("--channels", type=int, default=0, help="Also compare the streaming merge of N channel stores with load-all-and-sort.")
+    parser.add_argument("--json", type=str, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    print(f"Generating {args.messages:,} synthetic messages (match ratio {args.match_ratio})...")
+    posts = synthetic_posts(args.messages, match_ratio=args.match_ratio, seed=args.seed)
+    print(f"Corpus spans {describe_span(posts)}.")
+
+    results = {"messages": args.messages, "match_ratio": args.match_ratio, "seed": args.seed, "parsers": {}}
+    # The current parser reads Post tuples (as the stores yield them), the legacy one the raw API dicts.
+    parsers = [("current", dashboard.parse_game_posts, [dashboard.make_post(post) for post in posts])]
+    if not args.skip_legacy:
+        parsers.append(("legacy", legacy_parse_timeguessr_posts, posts))
+    for name, parse, corpus in parsers:
+        seconds, found = time_parser(parse, corpus, args.repeat)
+        rate = args.messages / seconds if seconds else float('inf')
+        results["parsers"][name] = {"seconds": round(seconds, 4), "messages_per_second": round(rate), "valid_results": found}
+        print(f"{name:>8}: {seconds:8.3f}s  {rate:12,.0f} msg/s  {found:,} valid results")
+
+    if not args.skip_legacy:
+        current, legacy = results["parsers"]["current"], results["parsers"]["legacy"]
+        results["speedup"] = round(legacy["seconds"] / current["seconds"], 2) if current["seconds"] else None
+        results["mismatches"] = check_against_legacy(posts)
+        print(f" speedup: {results['speedup']}x, mismatches against legacy: {results['mismatches']}")
+
+    if args.workers > 1:
+        single, sharded, identical = check_workers(posts, args.workers)
+        results["workers"] = {"count": args.workers, "single_seconds": round(single, 4),
+                              "sharded_seconds": round(sharded, 4), "identical": identical}
+        print(f"   store: 1 process {single:.3f}s, {args.workers} processes {sharded:.3f}s, identical results: {identical}")
+        if not identical:
+            print("ERROR: sharded parsing selected different score records than single-process parsing.")
+
+    if args.channels > 1:
+        merged_s, sorted_s, merged_peak, sorted_peak, identical = check_channel_merge(posts, args.channels)
+        results["channel_merge"] = {"channels": args.channels, "merge_seconds": round(merged_s, 4), "sort_seconds": round(sorted_s, 4),
+                                    "merge_peak_bytes": merged_peak, "sort_peak_bytes": sorted_peak, "identical": identical}
+        print(f"   merge: {args.channels} channels, streaming merge {merged_s:.3f}s / peak {merged_peak / 1e6:.1f} MB, "
+              f"load-all-and-sort {sorted_s:.3f}s / peak {sorted_peak / 1e6:.1f} MB, identical results: {identical}")
+        if not identical:
+            print("ERROR: the streaming merge selected different score records than load-all-and-sort.")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+        print(f"Results written to {args.json}")
+    if (results.get("mismatches") or not results.get("workers", {}).get("identical", True)
+            or not results.get("channel_merge", {}).get("identical", True)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Size and parse-time comparison of the dashboard data encodings.
+
+Builds synthetic player data (players x days of history), encodes it as the legacy inlined
+JSON (indent=4), minified JSON and the columnar payload, and reports raw, gzip and (if the
+brotli package is installed) brotli sizes. Parse time is measured with Python's json module
+and, when `node` is on the PATH, in JavaScript with JSON.parse plus decodePlayerData, which
+also checks that the columnar payload decodes back to exactly the original player data.
+
+    python benchmarks/bench_payload.py --players 40 --days 1500
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import newGenerateDashboard as dashboard
+
+NODE_SCRIPT = """
+const fs = require('fs');
+%s
+const [plainPath, columnarPath, repeat] = process.argv.slice(2);
+function best(fn) { let b = Infinity; for (let i = 0; i < +repeat; i++) { const t = process.hrtime.bigint(); fn(); b = Math.min(b, Number(process.hrtime.bigint() - t) / 1e6); } return b; }
+const plainText = fs.readFileSync(plainPath, 'utf8'), columnarText = fs.readFileSync(columnarPath, 'utf8');
+const result = {
+    json_ms: best(() => JSON.parse(plainText)),
+    columnar_ms: best(() => decodePlayerData(JSON.parse(columnarText))),
+    roundtrip_ok: JSON.stringify(Object.entries(JSON.parse(plainText)).map(([k, v]) => [k, Object.keys(v).sort().map(f => [f, v[f]])]))
+        === JSON.stringify(Object.entries(decodePlayerData(JSON.parse(columnarText))).map(([k, v]) => [k, Object.keys(v).sort().map(f => [f, v[f]])])),
+};
+console.log(JSON.stringify(result));
+"""
+
+
+def make_player_data(players, days, participation, seed):
+    """Builds player data shaped like create_player_data's output."""
+    rng = random.Random(seed)
+    start = date(2022, 1, 1)
+    player_data = {}
+    for pid in range(1, players + 1):
+        scores = {}
+        for offset in range(days):
+            if rng.random() < participation:
+                scores[(start + timedelta(days=offset)).isoformat()] = rng.randint(3000, 50000)
+        if not scores:
+            continue
+        values = list(scores.values())
+        player_data[pid] = {
+            'scores_by_date': scores, 'name': f"Player {pid}", 'total_games': len(values),
+            'average_score': round(sum(values) / len(values)), 'high_score': max(values), 'low_score': min(values),
+            'avg_location_score': round(rng.uniform(0.5, 2), 2), 'avg_date_score': round(rng.uniform(0.5, 2), 2),
+        }
+    return player_data
+
+
+def sizes(blob):
+    """Returns raw/gzip/brotli sizes in bytes for one encoded payload."""
+    result = {"raw": len(blob), "gzip": len(gzip.compress(blob, compresslevel=9))}
+    try:
+        import brotli
+        result["brotli"] = len(brotli.compress(blob, quality=11))
+    except ImportError:
+        pass
+    return result
+
+
+def python_parse_ms(blob, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        json.loads(blob)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 3)
+
+
+def node_parse(plain_blob, columnar_blob, repeat):
+    """Times JSON.parse (+ decodePlayerData) in node. Returns None when node is not available."""
+    node = shutil.which("node")
+    if node is None:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for name, blob in (("plain.json", plain_blob), ("columnar.json", columnar_blob), ("bench.js", None)):
+            path = os.path.join(tmp, name)
+            with open(path, 'wb') as f:
+                f.write(blob if blob is not None else (NODE_SCRIPT % dashboard.PLAYER_DATA_DECODER_JS).encode('utf-8'))
+            paths.append(path)
+        output = subprocess.run([node, paths[2], paths[0], paths[1], str(repeat)], check=True, capture_output=True, text=True)
+    return json.loads(output.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the size and parse time of the dashboard data encodings.")
+    parser.add_argument("--players", type=int, default=40)
+    parser.add_argument("--days", type=int, default=1500, help="Days of history.")
+    parser.add_argument("--participation", type=float, default=0.7, help="Chance that a player plays on a given day.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=str, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    player_data = make_player_data(args.players, args.days, args.participation, args.seed)
+    columnar = dashboard.encode_player_data(player_data, 'columnar')
+    encodings = {
+        "legacy (indent=4)": json.dumps(player_data, indent=4).encode('utf-8'),
+        "json (minified)": json.dumps(player_data, separators=(',', ':')).encode('utf-8'),
+        "columnar": json.dumps(columnar, separators=(',', ':')).encode('utf-8'),
+    }
+
+    games = sum(len(d['scores_by_date']) for d in player_data.values())
+    print(f"{len(player_data)} players, {args.days} days, {games:,} games")
+    results = {"players": len(player_data), "days": args.days, "games": games, "encodings": {}}
+    for name, blob in encodings.items():
+        entry = sizes(blob)
+        entry["python_parse_ms"] = python_parse_ms(blob, args.repeat)
+        results["encodings"][name] = entry
+        compressed = "  ".join(f"{k} {v:>10,}" for k, v in entry.items() if k not in ("raw", "python_parse_ms"))
+        print(f"{name:>18}: raw {entry['raw']:>10,}  {compressed}  python parse {entry['python_parse_ms']:8.2f} ms")
+
+    node = node_parse(encodings["json (minified)"], encodings["columnar"], args.repeat)
+    if node is not None:
+        results["node"] = node
+        print(f"{'node':>18}: JSON.parse {node['json_ms']:.2f} ms, columnar parse+decode {node['columnar_ms']:.2f} ms, "
+              f"round trip {'OK' if node['roundtrip_ok'] else 'MISMATCH'}")
+    else:
+        print("node not found: skipping the JavaScript parse timing and round-trip check.")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+        print(f"Results written to {args.json}")
+    if node is not None and not node["roundtrip_ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
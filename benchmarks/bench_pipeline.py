@@ -0,0 +1,240 @@
+"""
+End-to-end benchmark of the dashboard pipeline against a local mock of the chat API.
+
+Generates synthetic channel archives (see synthetic_chat.py): --players players chatting in --channels
+channels for --days days, --posts-per-day messages a day per channel, --match-ratio of them TimeGuessr
+shares. mock_chat_server.py serves them without their last --update-days days, and each phase then runs
+newGenerateDashboard.py in a fresh process against it:
+
+    init      --init: full download, parsing, aggregation and HTML generation
+    update    --update once the held-back days have been posted: the incremental path
+    rebuild   --update --rebuild: reparse and re-aggregate every stored post (no new posts)
+
+Each phase reports its wall time, the stage timings and counters of its --metrics-file, throughput,
+the peak RSS of its process (where the `resource` module exists) and the size of the outputs and stores.
+The results are written as JSON. --compare checks them against an earlier results file and exits with 1
+when a phase got slower (or bigger) than --tolerance allows.
+
+    python benchmarks/bench_pipeline.py --days 1095 --channels 2 --json baseline.json
+    python benchmarks/bench_pipeline.py --days 1095 --channels 2 --compare baseline.json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import newGenerateDashboard as dashboard
+from synthetic_chat import iter_synthetic_posts, describe_span, START_DATE
+from mock_chat_server import MockChat, serve
+
+RESULT_MARKER = "BENCH_PIPELINE_RESULT "
+PHASES = [
+    ("init", ["--init"]),
+    ("update", ["--update"]),
+    ("rebuild", ["--update", "--rebuild"]),
+]
+PARSE_STAGES = ("parse", "aggregate", "parse_and_aggregate")  # --init parses during the download instead (inside "sync").
+
+
+def make_archives(channels, days, posts_per_day, players, match_ratio, update_days, seed):
+    """
+    Returns ({channel ID: posts served from the start}, {channel ID: posts held back for the update}).
+    All channels share the same players, so the first-score-of-the-day rule works across channels.
+    """
+    cutoff_ms = int((START_DATE + timedelta(days=days - update_days)).timestamp() * 1000)
+    initial, held_back = {}, {}
+    for i in range(channels):
+        channel_id = i + 1
+        posts = iter_synthetic_posts(days * posts_per_day, players=players, match_ratio=match_ratio, posts_per_day=posts_per_day,
+                                     seed=seed + i, first_post_id=1 + i * 1_000_000_000)
+        initial[channel_id], held_back[channel_id] = [], []
+        for post in posts:
+            (initial if post["create_at"] < cutoff_ms else held_back)[channel_id].append(post)
+    return initial, held_back
+
+
+def run_phase(port, channel_ids, pipeline_args):
+    """Runs the pipeline in this process (the child side of measure_phase) and prints its wall time and peak RSS."""
+    dashboard.API_URL = f"http://127.0.0.1:{port}/webapi/entry.cgi"
+    dashboard.CHANNEL_IDS = channel_ids
+    sys.argv = ["newGenerateDashboard.py"] + pipeline_args
+    start = time.perf_counter()
+    dashboard.main()
+    seconds = time.perf_counter() - start
+    peak_rss = None
+    if resource is not None:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    print(RESULT_MARKER + json.dumps({"seconds": seconds, "peak_rss_bytes": peak_rss}))
+
+
+def read_metrics(path):
+    """
+    Sums a --metrics-file (JSON lines) into ({stage: seconds}, {counter: value}). The snapshots are
+    cumulative, so only the latest one of each run is counted.
+    """
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    latest = {}
+    for entry in entries:
+        latest[entry.get("run")] = max(latest.get(entry.get("run"), 0), entry.get("snapshot", 0))
+    stages, counters = defaultdict(float), defaultdict(float)
+    for entry in entries:
+        if entry.get("snapshot", 0) != latest[entry.get("run")]:
+            continue
+        name = entry["metric"][len(dashboard.METRICS_PREFIX):]
+        if name == "stage_seconds_total":
+            stages[entry["labels"]["stage"]] += entry["value"]
+        elif name != "output_bytes":
+            counters[name] += entry["value"]
+    return dict(stages), dict(counters)
+
+
+def get_total_size(pattern):
+    """Returns the total size in bytes of the files matching a glob pattern."""
+    return sum(os.path.getsize(path) for path in glob.glob(pattern) if os.path.isfile(path))
+
+
+def measure_phase(name, pipeline_args, workdir, port, channel_ids):
+    """Runs one phase in a fresh process in `workdir` and returns its results."""
+    metrics_path = os.path.join(workdir, f"metrics-{name}.jsonl")
+    args = pipeline_args + ["--out", os.path.join(workdir, "out", "timeguessr.html"), "--rate-limit", "0", "--metrics-file", metrics_path]
+    command = [sys.executable, os.path.abspath(__file__), "--run-phase", json.dumps({"port": port, "channel_ids": channel_ids, "args": args})]
+    completed = subprocess.run(command, cwd=workdir, capture_output=True, text=True, encoding="utf-8")
+    marker_lines = [line for line in completed.stdout.splitlines() if line.startswith(RESULT_MARKER)]
+    if completed.returncode != 0 or not marker_lines:
+        print(completed.stdout[-3000:], completed.stderr[-3000:], sep="\n")
+        raise RuntimeError(f"Phase '{name}' failed (exit code {completed.returncode}).")
+
+    result = json.loads(marker_lines[-1][len(RESULT_MARKER):])
+    stages, counters = read_metrics(metrics_path)
+    parse_seconds = sum(stages.get(stage, 0.0) for stage in PARSE_STAGES)
+    fetched, scanned = counters.get("posts_fetched_total", 0), counters.get("posts_scanned_total", 0)
+    separate_parse = "parse" in stages or "parse_and_aggregate" in stages
+    return {
+        "seconds": round(result["seconds"], 4),
+        "peak_rss_bytes": result["peak_rss_bytes"],
+        "stages": {stage: round(seconds, 4) for stage, seconds in sorted(stages.items())},
+        "posts_fetched": int(fetched),
+        "posts_scanned": int(scanned),
+        "scores_merged": int(counters.get("scores_merged_total", 0)),
+        "api_requests": int(counters.get("api_requests_total", 0)),
+        "api_response_bytes": int(counters.get("api_response_bytes_total", 0)),
+        # End to end, since the channels are fetched in parallel and their "sync" stages overlap.
+        "fetch_posts_per_second": round(fetched / result["seconds"]) if fetched > len(channel_ids) else None,
+        "parse_posts_per_second": round(scanned / parse_seconds) if scanned and parse_seconds and separate_parse else None,
+        "output_bytes": get_total_size(os.path.join(workdir, "out", "*")),
+        "store_bytes": get_total_size(os.path.join(workdir, "data_channel-*.sqlite3*")),
+    }
+
+
+def print_phase(name, phase):
+    """Prints one phase's results on two lines."""
+    peak = f"{phase['peak_rss_bytes'] / 1e6:.0f} MB" if phase["peak_rss_bytes"] else "n/a"
+    rates = []
+    if phase["fetch_posts_per_second"]:
+        rates.append(f"fetch {phase['fetch_posts_per_second']:,} posts/s")
+    if phase["parse_posts_per_second"]:
+        rates.append(f"parse {phase['parse_posts_per_second']:,} posts/s")
+    print(f"{name:>8}: {phase['seconds']:8.2f}s  peak RSS {peak}  {', '.join(rates) or 'no posts processed'}  "
+          f"output {phase['output_bytes'] / 1e3:,.0f} kB  stores {phase['store_bytes'] / 1e6:,.1f} MB")
+    print(f"{'':>10}{phase['posts_fetched']:,} posts fetched in {phase['api_requests']:,} requests, {phase['posts_scanned']:,} scanned, "
+          f"{phase['scores_merged']:,} scores merged | " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in phase["stages"].items()))
+
+
+def compare_results(results, baseline, tolerance):
+    """Prints each phase against `baseline` and returns the list of regressions (wall time, peak RSS, output size)."""
+    if baseline.get("config") != results["config"]:
+        print("WARNING: the baseline was run with a different configuration; the comparison is only indicative.")
+    regressions = []
+    for name, phase in results["phases"].items():
+        old = baseline.get("phases", {}).get(name)
+        if old is None:
+            continue
+        for key, label in (("seconds", "time"), ("peak_rss_bytes", "peak RSS"), ("output_bytes", "output size")):
+            if not old.get(key) or phase.get(key) is None:
+                continue
+            ratio = phase[key] / old[key]
+            flag = ratio > 1 + tolerance
+            number = "{:>14,.2f}" if key == "seconds" else "{:>14,.0f}"
+            print(f"{name:>8} {label:<11} {number.format(old[key])} -> {number.format(phase[key])}  ({ratio - 1:+.1%}){'  REGRESSION' if flag else ''}")
+            if flag:
+                regressions.append(f"{name} {label}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the dashboard pipeline against a local mock of the chat API.")
+    parser.add_argument("--channels", type=int, default=2, help="Number of channels.")
+    parser.add_argument("--days", type=int, default=365, help="Days of history per channel.")
+    parser.add_argument("--posts-per-day", type=int, default=300, help="Messages per day and channel.")
+    parser.add_argument("--players", type=int, default=12, help="Number of players (shared by all channels).")
+    parser.add_argument("--match-ratio", type=float, default=0.05, help="Fraction of messages that are TimeGuessr shares.")
+    parser.add_argument("--update-days", type=int, default=7, help="Days held back from --init and posted before --update.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the mock server adds to every response.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic archives.")
+    parser.add_argument("--json", type=str, help="Write the results to this JSON file.")
+    parser.add_argument("--compare", type=str, help="Compare with an earlier results file and exit with 1 on a regression.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative slowdown or growth before --compare reports a regression.")
+    parser.add_argument("--run-phase", type=str, help=argparse.SUPPRESS)  # Internal: runs one phase in this process.
+    args = parser.parse_args()
+
+    if args.run_phase:
+        config = json.loads(args.run_phase)
+        run_phase(config["port"], config["channel_ids"], config["args"])
+        return
+
+    config = {key: getattr(args, key) for key in ("channels", "days", "posts_per_day", "players", "match_ratio", "update_days", "latency", "seed")}
+    print(f"Generating {args.channels} channel(s) x {args.days:,} days x {args.posts_per_day} posts/day "
+          f"({args.players} players, match ratio {args.match_ratio})...")
+    initial, held_back = make_archives(args.channels, args.days, args.posts_per_day, args.players, args.match_ratio, args.update_days, args.seed)
+    first_channel = initial[1] + held_back[1]
+    print(f"Each channel spans {describe_span(first_channel)}: {len(first_channel):,} posts, "
+          f"{sum(len(posts) for posts in held_back.values()):,} of them held back for the update.")
+
+    chat = MockChat(initial, latency=args.latency, seed=args.seed)
+    server = serve(chat)
+    port, channel_ids = server.server_address[1], sorted(initial)
+    results = {"config": config, "environment": {"python": platform.python_version(), "platform": platform.platform()}, "phases": {}}
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for name, pipeline_args in PHASES:
+                if name == "update":
+                    for channel_id, posts in held_back.items():
+                        chat.add_posts(channel_id, posts)
+                results["phases"][name] = measure_phase(name, pipeline_args, workdir, port, channel_ids)
+                print_phase(name, results["phases"][name])
+    finally:
+        server.shutdown()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"Results written to {args.json}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
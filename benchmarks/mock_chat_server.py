@@ -0,0 +1,297 @@
+"""
+Local mock of the Synology Chat SYNO.Chat.Post "list" API, for testing the fetcher offline.
+
+Serves synthetic channels (see synthetic_chat.py) with the paging behaviour the dashboard relies on:
+without post_id the newest `prev_count` posts are returned, with post_id the `prev_count` posts before
+it, the post itself and the `next_count` posts after it, oldest first. Like a real server, it caps each
+side at --max-page posts (200 by default, below the fetcher's largest page size). Faults can be injected:
+HTTP 502s, garbled JSON, per-post latency (to exercise the adaptive page size) and auth errors.
+
+    python benchmarks/mock_chat_server.py --port 8765 --posts 20000 --fail-rate 0.1
+    (then point API_URL at http://127.0.0.1:8765/webapi/entry.cgi)
+
+    python benchmarks/mock_chat_server.py --self-test
+
+--self-test starts the server in-process and checks that a backfill through random failures stores
+every post, that an update picks up new posts (also when pages come back shorter than requested) and
+applies edits and deletions of recent ones, that --update --rebuild writes the same score tables and
+page with --workers 2 as in one process, that auth errors are not retried, that a dead server raises
+instead of being read as the end of the history, and that the page size adapts.
+"""
+import argparse
+import bisect
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_chat import synthetic_posts
+
+MOCK_MAX_PAGE = 200  # Below the dashboard's PAGE_SIZE_MAX, so syncs must cope with pages cut short by the server.
+
+
+class MockChat:
+    """The mock's channels, fault settings and request log. Settings may be changed while it is serving."""
+
+    def __init__(self, channels, max_page=MOCK_MAX_PAGE, fail_rate=0.0, garble_rate=0.0, latency=0.0,
+                 latency_per_post=0.0, auth_error=False, seed=0):
+        self.channels = channels  # channel ID -> chronological list of posts
+        self.max_page = max_page
+        self.fail_rate = fail_rate
+        self.garble_rate = garble_rate
+        self.latency = latency
+        self.latency_per_post = latency_per_post
+        self.auth_error = auth_error
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = []  # (channel ID, prev_count, next_count, HTTP status or "garbled") per request
+
+    def add_posts(self, channel_id, posts):
+        """Appends posts to a channel, as if they had just been written."""
+        with self.lock:
+            self.channels[channel_id].extend(posts)
+
+    def edit_post(self, channel_id, post_id, message):
+        """Replaces the message of a post, as if its author had edited it."""
+        with self.lock:
+            for post in self.channels[channel_id]:
+                if post["post_id"] == post_id:
+                    post["message"] = message
+                    post["update_at"] = int(time.time() * 1000)
+
+    def delete_post(self, channel_id, post_id):
+        """Removes a post, as if its author had deleted it."""
+        with self.lock:
+            self.channels[channel_id] = [p for p in self.channels[channel_id] if p["post_id"] != post_id]
+
+    def list_posts(self, channel_id, post_id, prev_count, next_count):
+        """Returns the page the real API would return, capped at max_page posts on each side."""
+        with self.lock:
+            posts = self.channels.get(channel_id, [])
+            prev_count, next_count = min(prev_count, self.max_page), min(next_count, self.max_page)
+            if post_id is None:
+                return posts[max(0, len(posts) - prev_count):] if prev_count else []
+            i = bisect.bisect_left([p["post_id"] for p in posts], post_id)
+            return posts[max(0, i - prev_count):min(len(posts), i + 1 + next_count)]
+
+    def handle(self, form):
+        """Returns (status, body bytes) for one request."""
+        channel_id = int(form.get("channel_id", 0))
+        prev_count, next_count = int(form.get("prev_count", 0)), int(form.get("next_count", 0))
+        with self.lock:
+            roll = self.rng.random()
+        if self.auth_error:
+            status, body = 200, {"success": False, "error": {"code": 119}}
+        elif roll < self.fail_rate:
+            status, body = 502, None
+        else:
+            post_id = int(form["post_id"]) if "post_id" in form else None
+            posts = self.list_posts(channel_id, post_id, prev_count, next_count)
+            time.sleep(self.latency + self.latency_per_post * len(posts))
+            status, body = 200, {"success": True, "data": {"posts": posts}}
+        garbled = status == 200 and not self.auth_error and roll < self.fail_rate + self.garble_rate
+        with self.lock:
+            self.requests.append((channel_id, prev_count, next_count, "garbled" if garbled else status))
+        if body is None:
+            return status, b"Bad Gateway"
+        data = json.dumps(body).encode("utf-8")
+        if garbled:
+            data = data[:len(data) // 2]  # A response cut off mid-stream.
+        return status, data
+
+
+def serve(chat, port=0):
+    """Starts the mock on 127.0.0.1:`port` (0 picks a free port) in a daemon thread. Returns the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+            status, data = chat.handle(form)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_channels(channel_ids, posts_per_channel, seed=0):
+    """Builds one synthetic history per channel, with disjoint post IDs."""
+    return {
+        channel_id: synthetic_posts(posts_per_channel, seed=seed + i, first_post_id=1 + i * 10_000_000)
+        for i, channel_id in enumerate(channel_ids)
+    }
+
+
+def self_test(posts_per_channel, seed=0):
+    """Runs the fetcher against an in-process mock. Returns the list of failed checks."""
+    import newGenerateDashboard as dashboard
+
+    chat = MockChat(make_channels([1], posts_per_channel, seed), seed=seed)
+    server = serve(chat)
+    dashboard.API_URL = f"http://127.0.0.1:{server.server_address[1]}/webapi/entry.cgi"
+    dashboard.API_RATE_LIMITER = dashboard.RateLimiter(0)
+    dashboard.FETCH_BACKOFF_BASE = 0.01
+    failures = []
+
+    def check(name, ok, detail=""):
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}{': ' + detail if detail else ''}")
+        if not ok:
+            failures.append(name)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            store = dashboard.open_post_store(1)
+            expected = [p["post_id"] for p in chat.channels[1]]
+
+            print("Backfill with 25% HTTP 502s and 10% garbled responses...")
+            chat.fail_rate, chat.garble_rate = 0.25, 0.1
+            dashboard.download_full_channel_history(1, store)
+            stored = [row[0] for row in store.execute("SELECT post_id FROM posts ORDER BY post_id")]
+            retried = sum(1 for r in chat.requests if r[3] != 200)
+            check("backfill stores every post", stored == expected, f"{len(stored)}/{len(expected)} posts, {retried} failed request(s) retried")
+
+            print("Update after new posts arrive...")
+            new_posts = synthetic_posts(250, seed=99, first_post_id=expected[-1] + 1)
+            chat.add_posts(1, new_posts)
+            dashboard.update_channel_history(1, store)
+            check("update stores the new posts", dashboard.get_stored_post_count(store) == len(expected) + 250)
+
+            print("Update after recent posts were edited and deleted...")
+            edited, deleted = new_posts[-10], new_posts[-20]
+            chat.edit_post(1, edited["post_id"], "edited")
+            chat.delete_post(1, deleted["post_id"])
+            before = len(chat.requests)
+            dashboard.SYNC_RESCAN_MIN_INTERVAL = 0  # The previous update has just rescanned.
+            dashboard.update_channel_history(1, store)
+            stored = dict(store.execute("SELECT post_id, message FROM posts WHERE post_id IN (?, ?)", (edited["post_id"], deleted["post_id"])))
+            check("the rescan applies edits and deletions in place", stored == {edited["post_id"]: "edited"},
+                  f"{len(chat.requests) - before} request(s)")
+
+            print("Update when the server caps pages below the requested size...")
+            chat.max_page, count = 100, dashboard.get_stored_post_count(store)
+            dashboard.update_channel_history(1, store)  # Grows the page size past the cap.
+            capped_posts = synthetic_posts(800, seed=98, first_post_id=dashboard.get_latest_post_id(store) + 1)
+            chat.add_posts(1, capped_posts)
+            dashboard.update_channel_history(1, store)
+            check("short pages do not end the update early", dashboard.get_stored_post_count(store) == count + 800,
+                  f"{dashboard.get_stored_post_count(store) - count}/800 posts")
+            chat.max_page = MOCK_MAX_PAGE
+
+            print("Adaptive page size with a slow server...")
+            chat.fail_rate = chat.garble_rate = 0.0
+            chat.max_page = dashboard.PAGE_SIZE_MAX  # Full pages, so their time follows the requested size.
+            page_size = dashboard.AdaptivePageSize()
+            sizes = [page_size.size]
+            for latency in (0.0, 0.0, 0.0, 0.01, 0.01):
+                chat.latency_per_post = latency  # 0.01s per post makes any page over 300 posts "slow"
+                dashboard.fetch_adaptive_page(1, page_size)
+                sizes.append(page_size.size)
+            chat.latency_per_post, chat.max_page = 0.0, MOCK_MAX_PAGE
+            check("page size grows while fast and shrinks when slow",
+                  max(sizes) == dashboard.PAGE_SIZE_MAX and sizes[-1] < max(sizes), " -> ".join(map(str, sizes)))
+
+            print("Rebuild with --workers 2 against a single process...")
+            dashboard.CHANNEL_IDS, argv = [1], sys.argv
+            outputs = []
+            try:
+                for workers in ("1", "2"):
+                    sys.argv = ["newGenerateDashboard.py", "--update", "--rebuild", "--workers", workers,
+                                "--rate-limit", "0", "--out", "timeguessr.html"]
+                    dashboard.main()
+                    state = dashboard.sqlite3.connect(dashboard.SCORE_STATE_FILENAME)
+                    tables = [state.execute(f"SELECT * FROM {table} ORDER BY 1, 2, 3").fetchall() for table in ("scores", "player_aggregates")]
+                    state.close()
+                    with open("timeguessr.html", encoding="utf-8") as f:
+                        outputs.append((tables, f.read()))
+            finally:
+                sys.argv = argv
+            check("--workers 2 writes the same scores, aggregates and page as one process",
+                  outputs[0][0][0] and outputs[0] == outputs[1], f"{len(outputs[0][0][0])} score rows")
+
+            print("Auth error...")
+            chat.auth_error, before = True, len(chat.requests)
+            try:
+                dashboard.fetch_message_batch(1)
+                check("auth error raises ChatAuthError", False, "no exception")
+            except dashboard.ChatAuthError:
+                check("auth error raises ChatAuthError without retrying", len(chat.requests) - before == 1)
+            chat.auth_error = False
+
+            print("Server down for good during a backfill...")
+            chat.fail_rate, before = 1.0, len(chat.requests)
+            store.execute("DELETE FROM posts WHERE post_id < ?", (expected[len(expected) // 2],))
+            store.commit()
+            dashboard.set_store_meta(store, 'backfill_oldest_post_id', expected[len(expected) // 2])
+            try:
+                dashboard.download_full_channel_history(1, store)
+                check("a dead server raises ChatAPIError", False, "the backfill finished as if the history had ended")
+            except dashboard.ChatAuthError:
+                check("a dead server raises ChatAPIError", False, "raised ChatAuthError")
+            except dashboard.ChatAPIError:
+                check("a dead server raises ChatAPIError after the retries",
+                      len(chat.requests) - before == dashboard.FETCH_RETRIES + 1)
+            check("the backfill checkpoint survives the failure",
+                  dashboard.get_store_meta(store, 'backfill_oldest_post_id') is not None)
+            store.close()
+        finally:
+            os.chdir(cwd)
+            server.shutdown()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Synology Chat API serving synthetic channels.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (127.0.0.1).")
+    parser.add_argument("--channels", type=str, default="463,290", help="Comma-separated channel IDs to serve.")
+    parser.add_argument("--posts", type=int, default=20000, help="Synthetic posts per channel.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic channels and the fault injection.")
+    parser.add_argument("--max-page", type=int, default=MOCK_MAX_PAGE, help="Largest page the server returns on each side of the anchor.")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 502.")
+    parser.add_argument("--garble-rate", type=float, default=0.0, help="Fraction of requests answered with truncated JSON.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every successful response.")
+    parser.add_argument("--latency-per-post", type=float, default=0.0, help="Seconds added per returned post.")
+    parser.add_argument("--auth-error", action="store_true", help="Reject every request with an invalid-session error.")
+    parser.add_argument("--self-test", action="store_true", help="Check the dashboard's fetcher against an in-process mock and exit.")
+    args = parser.parse_args()
+
+    if args.self_test:
+        failures = self_test(min(args.posts, 5000), args.seed)
+        print("All checks passed." if not failures else f"{len(failures)} check(s) failed.")
+        sys.exit(1 if failures else 0)
+
+    channel_ids = [int(c) for c in args.channels.split(",") if c.strip()]
+    chat = MockChat(make_channels(channel_ids, args.posts, args.seed), max_page=args.max_page,
+                    fail_rate=args.fail_rate, garble_rate=args.garble_rate, latency=args.latency,
+                    latency_per_post=args.latency_per_post, auth_error=args.auth_error, seed=args.seed)
+    server = serve(chat, args.port)
+    print(f"Serving {len(channel_ids)} channel(s) x {args.posts:,} posts on http://127.0.0.1:{server.server_address[1]}/webapi/entry.cgi (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Synthetic Synology Chat history for benchmarks.
+
+Generates posts shaped like the ones returned by SYNO.Chat.Post, mixing ordinary chatter,
+near-miss messages and TimeGuessr shares (valid, truncated and same-day retries).
+Everything is driven by a seeded random.Random, so a given set of arguments always yields
+the same corpus.
+"""
+import random
+from datetime import datetime, timedelta
+
+GREEN, YELLOW, BLACK = '🟩', '🟨', '⬛️'
+FIRST_TIMEGUESSR_GAME = 150
+START_DATE = datetime(2023, 1, 1, 8, 0)
+
+NOISE_MESSAGES = [
+    "lunch?", "ok", "see you at 2", "did anyone check the build", "haha",
+    "meeting moved to tomorrow", "https://example.com/article", "👍", "merci !",
+    "who is playing TimeGuessr today?", "TimeGuessr was hard today",
+    "🌎 is round the corner 📅 soon", "I got 41,230/50,000 on something else",
+]
+
+
+def make_round_line(rng, variation_selectors=True):
+    """Returns one '🌎xxx 📅xxx' round line."""
+    black = BLACK if variation_selectors else BLACK[0]
+    loc = ''.join(rng.choice((GREEN, YELLOW, black)) for _ in range(3))
+    when = ''.join(rng.choice((GREEN, YELLOW, black)) for _ in range(3))
+    return f"🌎{loc} 📅{when}"
+
+
+def make_timeguessr_message(rng, game_number, rounds=5):
+    """Returns a TimeGuessr share. Fewer than 5 rounds gives an invalid (truncated) share."""
+    score = rng.randint(3000, 50000)
+    lines = [f"TimeGuessr #{game_number} {score:,}/50,000"]
+    lines.extend(make_round_line(rng, variation_selectors=rng.random() < 0.7) for _ in range(rounds))
+    lines.append("https://timeguessr.com")
+    return '\n'.join(lines)
+
+
+def iter_synthetic_posts(count, players=12, match_ratio=0.05, posts_per_day=300, seed=0,
+                         start=START_DATE, first_post_id=1, creator_offset=1):
+    """
+    Yields `count` posts in chronological order. About `match_ratio` of them are TimeGuessr
+    shares; of those, roughly 1 in 20 is truncated and some are second attempts on the same day.
+    """
+    rng = random.Random(seed)
+    day_ms = 24 * 3600 * 1000
+    start_ms = int(start.timestamp() * 1000)
+    step_ms = max(1, day_ms // posts_per_day)
+    for i in range(count):
+        create_at = start_ms + i * step_ms
+        day_index = (create_at - start_ms) // day_ms
+        creator_id = creator_offset + rng.randrange(players)
+        if rng.random() < match_ratio:
+            rounds = 4 if rng.random() < 0.05 else 5
+            message = make_timeguessr_message(rng, FIRST_TIMEGUESSR_GAME + day_index, rounds=rounds)
+        else:
+            message = rng.choice(NOISE_MESSAGES)
+        yield {
+            "post_id": first_post_id + i, "create_at": create_at,
+            "creator_id": creator_id, "message": message,
+        }
+
+
+def synthetic_posts(count, **kwargs):
+    """Materialises iter_synthetic_posts into a list."""
+    return list(iter_synthetic_posts(count, **kwargs))
+
+
+def describe_span(posts):
+    """Returns a short 'first day -> last day' description of a chronological post list."""
+    if not posts:
+        return "empty"
+    first = datetime.fromtimestamp(posts[0]["create_at"] / 1000).date()
+    last = datetime.fromtimestamp(posts[-1]["create_at"] / 1000).date()
+    return f"{first} -> {last} ({(last - first + timedelta(days=1)).days} days)"
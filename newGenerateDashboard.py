@@ -1,13 +1,29 @@
 import json
 import re
-from datetime import datetime, date
-from collections import defaultdict
+from datetime import datetime, date, timedelta
 import requests
 import urllib3
 import argparse
 import os
 import time
+import random
 import subprocess
+import hashlib
+import gzip
+import glob
+import sqlite3
+import threading
+import queue
+import heapq
+import bisect
+import zlib
+import cProfile
+import pstats
+import tracemalloc
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 
 # --- Configuration ---
 # Suppress the InsecureRequestWarning for self-signed certificates.
@@ -37,9 +53,161 @@ SYNO_TOKEN = "YOUR_SYNO_TOKEN_HERE"
 API_URL = "https://your-server-address:port/webapi/entry.cgi"
 
 # --- Hardcoded Script Settings ---
-TIMEGUESSR_REGEX = re.compile(r"TimeGuessr #\d{3,4} \d{1,2},\d{3}/50,000")
+TIMEGUESSR_PREFIX = "TimeGuessr #"  # Cheap substring check done before any regex runs.
+TIMEGUESSR_REGEX = re.compile(r"TimeGuessr #(\d{3,4}) (\d{1,2},\d{3})/50,000")
+# One match per "🌎<3 emojis> 📅<3 emojis>" line, anchored at the start of each line.
+TIMEGUESSR_ROUND_REGEX = re.compile(r"^[^\S\n]*🌎(.*?)[^\S\n]+📅(.*)", re.MULTILINE)
 DEFAULT_HTML_OUTPUT = 'timeguessr_dashboard.html'
+DEFAULT_DATA_FORMAT = 'columnar'  # 'columnar' (compact) or 'json' (the plain playerData object).
+DAILY_LEADERBOARD_DAYS = 31  # How many recent days get a precomputed daily leaderboard.
+CHART_MAX_POINTS = 400  # Chart lines with more points are downsampled (LTTB) in the page.
+GAME_LOG_ROW_BUFFER = 20  # Game log rows rendered above and below the visible ones.
+ROLLING_WINDOWS = (7, 30, 90)  # Days covered by the rolling averages kept for every game day.
+PERIOD_BEST_COUNTS = {'week': 12, 'month': 12}  # How many recent weeks/months get a precomputed table of bests.
+SCORE_STATE_FILENAME = 'timeguessr_scores.sqlite3'
+SCORE_STATE_VERSION = 5  # Bump when the parsing rules change to force a full reparse.
+PARSE_CHUNK_POSTS = 50000  # Posts per shard when parsing with --workers.
+COMPACT_POST_STORE = False  # Store new posts in compact form (see --compact-store).
+DEFAULT_GAME = 'timeguessr'  # The game whose dashboard is written to --out; other games get '<out>-<game>.html'.
 GIT_REPO_FOLDER_NAME = "ToolsWebsite"  # The name of the folder containing the git repo.
+GIT_PUBLISH_WINDOW = 300  # In --watch mode, seconds to collect dashboard updates before they are committed and pushed together.
+GIT_PUSH_TIMEOUT = 60  # Seconds before a hanging `git push` is abandoned.
+GIT_PUSH_RETRIES = 3  # Push attempts before giving up until the next publish.
+GIT_PUSH_RETRY_DELAY = 10  # Seconds to wait after the first failed push (doubled after each further failure).
+
+# --- Fetch Engine Settings ---
+FETCH_THREADS = 4  # How many channels are fetched in parallel.
+MAX_REQUESTS_PER_SECOND = 4.0  # Global API rate limit shared by all channels (0 disables it).
+HTTP_POOL_SIZE = 8  # Maximum number of kept-alive connections to the API server.
+BACKFILL_PREFETCH_BATCHES = 4  # How many pages the backfill may fetch ahead of the disk writer.
+FETCH_TIMEOUT = 30  # Seconds before an API request is abandoned (and retried).
+FETCH_RETRIES = 5  # Retries for a transient error (network, timeout, HTTP 429/5xx, garbled JSON) before giving up.
+FETCH_BACKOFF_BASE = 1.0  # Seconds before the first retry; doubled for each further retry.
+FETCH_BACKOFF_MAX = 30.0  # Upper bound of a single retry delay.
+PAGE_SIZE = 100  # Posts requested per page at the start of a sync.
+PAGE_SIZE_MIN = 20  # The page size never shrinks below this.
+PAGE_SIZE_MAX = 500  # ...nor grows above this.
+PAGE_FAST_SECONDS = 0.5  # Pages answered faster than this double the page size.
+PAGE_SLOW_SECONDS = 3.0  # Pages slower than this (retries included) halve it.
+SYNO_AUTH_ERROR_CODES = {105, 106, 107, 119}  # Permission denied, session timeout/interrupted, invalid SID.
+SYNC_RESCAN_HOURS = 48  # Posts this much older than a channel's sync cursor are re-fetched for edits and deletions (0 disables).
+SYNC_RESCAN_MIN_INTERVAL = 600  # Seconds between two rescans of the same channel (matters in --watch mode).
+
+# --- Watch Mode Settings ---
+WATCH_MIN_INTERVAL = 15  # Seconds between polls while new posts keep arriving.
+WATCH_MAX_INTERVAL = 600  # Upper bound of the poll interval after idle polls keep doubling it.
+
+# --- Instrumentation Settings ---
+METRICS_PREFIX = "timeguessr_"  # Prefix of every metric name in the metrics file.
+PROFILE_TOP_N = 25  # Entries shown per table by --profile.
+
+# --- Offline Bundle Settings (--offline) ---
+VENDOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vendor')  # Vendored scripts, copied next to the output.
+VENDOR_SCRIPTS = {  # File in VENDOR_DIR -> pinned CDN URL it is downloaded from when missing.
+    'chart.umd.js': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js',
+    'chartjs-adapter-date-fns.bundle.min.js': 'https://cdn.jsdelivr.net/npm/chartjs-adapter-date-fns@3.0.0/dist/chartjs-adapter-date-fns.bundle.min.js',
+}
+
+
+# ==============================================================================
+# SECTION 0B: RUN METRICS
+# ==============================================================================
+
+class RunMetrics:
+    """
+    Thread-safe counters and stage timings for a run, keyed by name and labels (e.g. channel=463).
+    Written to --metrics-file as JSON lines or as a Prometheus text file.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)  # (name, ((label, value), ...)) -> value
+        self.run_id = f"{int(time.time())}-{os.getpid()}"
+        self._snapshots = 0  # JSON line snapshots written so far by this run
+
+    def count(self, name, value=1, **labels):
+        """Adds `value` to a counter."""
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._values[key] += value
+
+    def set(self, name, value, **labels):
+        """Sets a gauge, such as the size of an output file."""
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def stage(self, stage, **labels):
+        """Times the enclosed block and adds it to stage_seconds_total{stage=...}."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.count("stage_seconds_total", time.perf_counter() - start, stage=stage, **labels)
+
+    def snapshot(self):
+        """Returns the current values as sorted (name, labels dict, value) triples."""
+        with self._lock:
+            return [(name, dict(labels), value) for (name, labels), value in sorted(self._values.items())]
+
+    def write(self, path, metrics_format='jsonl'):
+        """
+        Appends a JSON line per metric (jsonl) or overwrites `path` with the Prometheus text format.
+        The values are cumulative, and --watch writes after every regeneration, so each JSON line carries
+        the run's ID and a snapshot number: readers keep only the latest snapshot of each run.
+        """
+        timestamp = time.time()
+        self._snapshots += 1
+        lines = []
+        for name, labels, value in self.snapshot():
+            value = round(value, 6)
+            if value.is_integer():
+                value = int(value)  # Counters stay exact; a float format would round them.
+            if metrics_format == 'prometheus':
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{METRICS_PREFIX}{name}{{{label_text}}} {value!r}" if label_text else f"{METRICS_PREFIX}{name} {value!r}")
+            else:
+                lines.append(json.dumps({"time": timestamp, "run": self.run_id, "snapshot": self._snapshots,
+                                         "metric": METRICS_PREFIX + name, "labels": labels, "value": value}))
+        if metrics_format == 'prometheus':
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp_path, path)  # Collectors must never see a half-written file.
+        else:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+
+    def print_summary(self):
+        """Prints the time spent in each stage, summed over channels."""
+        totals = defaultdict(float)
+        for name, labels, value in self.snapshot():
+            if name == "stage_seconds_total":
+                totals[labels["stage"]] += value
+        if totals:
+            print("\nStage timings: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in totals.items()))
+
+METRICS = RunMetrics()
+
+def run_profiled(func, *args, top=PROFILE_TOP_N):
+    """
+    Runs func(*args) under cProfile and tracemalloc, then prints the top functions by cumulative time and the top allocation sites.
+    cProfile only follows the calling thread, so time spent in the fetch threads shows up as lock waits; see the sync stage metrics for it.
+    """
+    tracemalloc.start()
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args)
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"\n{'='*20} Profile: top {top} functions by cumulative time {'='*20}")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(top)
+        print(f"{'='*20} Profile: top {top} allocation sites (peak {peak / 1e6:.1f} MB) {'='*20}")
+        for stat in snapshot.statistics('lineno')[:top]:
+            print(stat)
 
 
 # ==============================================================================
@@ -57,8 +225,118 @@ def get_session_headers():
         "x-syno-token": SYNO_TOKEN,
     }
 
-def fetch_message_batch(channel_id, post_id=None, prev_count=100, next_count=0):
-    """Fetches a single batch of messages from the Synology Chat API for a given channel."""
+class RateLimiter:
+    """Spaces out API calls so that at most `rate` calls per second are made across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._waited = threading.local()
+
+    def wait(self):
+        """Blocks until the caller is allowed to make its next call."""
+        if not self.interval:
+            return
+        with self._lock:
+            slot = max(time.monotonic(), self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+            self._waited.seconds = self.get_waited() + delay
+
+    def get_waited(self):
+        """Returns the seconds the calling thread has spent blocked in wait() so far."""
+        return getattr(self._waited, 'seconds', 0.0)
+
+API_RATE_LIMITER = RateLimiter(MAX_REQUESTS_PER_SECOND)
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session():
+    """Returns the shared HTTP session, creating it on first use.
+    The session keeps TLS connections alive and is safe to share between the fetch threads."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(get_session_headers())
+            session.verify = False
+            _http_session = session
+        return _http_session
+
+class ChatAPIError(Exception):
+    """A Synology Chat API request failed for good (after any retries)."""
+
+class ChatAuthError(ChatAPIError):
+    """The API rejected the credentials; retrying will not help until SYNO_TOKEN/COOKIE_STRING are updated."""
+
+class TransientChatError(ChatAPIError):
+    """A failure worth retrying: network error, timeout, HTTP 429/5xx or a garbled response."""
+
+class AdaptivePageSize:
+    """
+    Tunes how many posts one channel asks for per page. The size doubles while pages come back within
+    PAGE_FAST_SECONDS and halves when a page takes longer than PAGE_SLOW_SECONDS (retry delays included,
+    waits for the client's own rate limit not; see fetch_adaptive_page).
+    """
+
+    def __init__(self, size=PAGE_SIZE, minimum=PAGE_SIZE_MIN, maximum=PAGE_SIZE_MAX):
+        self.minimum, self.maximum = minimum, maximum
+        self.size = max(minimum, min(size, maximum))
+
+    def record(self, elapsed):
+        """Adjusts the size after a page took `elapsed` seconds."""
+        if elapsed > PAGE_SLOW_SECONDS:
+            self.size = max(self.minimum, self.size // 2)
+        elif elapsed < PAGE_FAST_SECONDS:
+            self.size = min(self.maximum, self.size * 2)
+
+def request_message_batch(channel_id, payload):
+    """Makes one SYNO.Chat.Post list request and classifies any failure (see fetch_message_batch)."""
+    API_RATE_LIMITER.wait()
+    try:
+        with METRICS.stage("api_request", channel=channel_id):
+            response = get_http_session().post(API_URL, data=payload, timeout=FETCH_TIMEOUT)
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        raise TransientChatError(f"HTTP request failed: {e}") from e
+    except requests.exceptions.RequestException as e:
+        raise ChatAPIError(f"HTTP request failed: {e}") from e
+    METRICS.count("api_requests_total", channel=channel_id)
+    METRICS.count("api_response_bytes_total", len(response.content), channel=channel_id)
+
+    if response.status_code in (401, 403):
+        raise ChatAuthError(f"HTTP {response.status_code}: the server rejected the credentials.")
+    if response.status_code == 429 or response.status_code >= 500:
+        raise TransientChatError(f"HTTP {response.status_code}")
+    if response.status_code >= 400:
+        raise ChatAPIError(f"HTTP {response.status_code}")
+    try:
+        data = response.json()
+    except ValueError as e:
+        raise TransientChatError("Failed to parse JSON response.") from e
+
+    if data.get("success"):
+        posts = data.get("data", {}).get("posts", [])
+        METRICS.count("posts_fetched_total", len(posts), channel=channel_id)
+        return posts
+    error = data.get("error")
+    code = error.get("code") if isinstance(error, dict) else None
+    if code in SYNO_AUTH_ERROR_CODES:
+        raise ChatAuthError(f"API error {error}: the session or token is no longer valid.")
+    raise ChatAPIError(f"API error: {error}")
+
+def fetch_message_batch(channel_id, post_id=None, prev_count=100, next_count=0, retries=FETCH_RETRIES):
+    """
+    Fetches a single batch of messages from the Synology Chat API for a given channel.
+    An empty list means there are no (more) posts. Transient failures are retried with capped exponential
+    backoff; raises ChatAuthError right away for rejected credentials, and ChatAPIError for any other
+    error or once the retries are used up, so that a failed page is never mistaken for the end of the history.
+    """
     payload = {
         "api": "SYNO.Chat.Post", "method": "list", "version": "5",
         "channel_id": channel_id, "prev_count": prev_count,
@@ -67,36 +345,42 @@ def fetch_message_batch(channel_id, post_id=None, prev_count=100, next_count=0):
     if post_id:
         payload["post_id"] = post_id
 
-    try:
-        response = requests.post(API_URL, headers=get_session_headers(), data=payload, verify=False)
-        response.raise_for_status()
-        data = response.json()
-        if data.get("success"):
-            return data.get("data", {}).get("posts", [])
-        else:
-            print(f"API Error for channel {channel_id}: {data.get('error')}")
-            return None
-    except requests.exceptions.RequestException as e:
-        print(f"An HTTP error occurred for channel {channel_id}: {e}")
-    except ValueError:
-        print(f"Failed to parse JSON response for channel {channel_id}.")
-    return None
+    for attempt in range(retries + 1):
+        try:
+            return request_message_batch(channel_id, payload)
+        except TransientChatError as e:
+            METRICS.count("api_errors_total", channel=channel_id, kind="transient")
+            if attempt == retries:
+                raise ChatAPIError(f"Channel {channel_id}: giving up after {retries + 1} attempts ({e})") from e
+            delay = min(FETCH_BACKOFF_MAX, FETCH_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+            print(f"[channel {channel_id}] {e} Retrying in {delay:.1f}s ({attempt + 1}/{retries})...")
+            time.sleep(delay)
+        except ChatAuthError:
+            METRICS.count("api_errors_total", channel=channel_id, kind="auth")
+            raise
+        except ChatAPIError:
+            METRICS.count("api_errors_total", channel=channel_id, kind="api")
+            raise
+
+def fetch_adaptive_page(channel_id, page_size, post_id=None, forward=False):
+    """
+    Fetches one page of `page_size.size` posts before `post_id` (after it with `forward`) and adjusts the
+    AdaptivePageSize to how long the server took. Time spent waiting for the rate limiter is not counted:
+    it says nothing about the server, and would otherwise shrink the pages whenever the limit is tight.
+    """
+    waited = API_RATE_LIMITER.get_waited()
+    start = time.monotonic()
+    batch = fetch_message_batch(channel_id, post_id=post_id, prev_count=0 if forward else page_size.size,
+                                next_count=page_size.size if forward else 0)
+    page_size.record(time.monotonic() - start - (API_RATE_LIMITER.get_waited() - waited))
+    return batch
 
 def get_local_data_filename(channel_id):
-    """Generates the local data filename for a given channel."""
+    """Generates the legacy JSON archive filename for a given channel."""
     return f"data_channel-{channel_id}.json"
 
-def save_local_posts(channel_id, posts):
-    """Saves a list of posts to the local data file for a given channel."""
-    filename = get_local_data_filename(channel_id)
-    posts_by_id = {post['post_id']: post for post in posts}
-    sorted_posts = sorted(posts_by_id.values(), key=lambda p: p['create_at'])
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(sorted_posts, f, ensure_ascii=False, indent=4)
-    print(f"Successfully saved {len(sorted_posts)} total messages to {filename}")
-
 def load_local_posts(channel_id):
-    """Loads posts from the local data file for a given channel."""
+    """Loads posts from the legacy JSON archive for a given channel."""
     filename = get_local_data_filename(channel_id)
     if not os.path.exists(filename):
         return []
@@ -107,129 +391,1204 @@ def load_local_posts(channel_id):
             print(f"Warning: Could not decode {filename}. Starting fresh for this channel.")
             return []
 
-def download_full_channel_history(channel_id):
-    """Downloads the entire message history for a given channel."""
-    print(f"Starting full download for channel ID: {channel_id}...")
-    all_posts = []
-    
-    latest_batch = fetch_message_batch(channel_id, prev_count=100, next_count=0)
-    if not latest_batch:
-        print(f"Failed to fetch initial batch for channel {channel_id}. Aborting.")
-        return []
 
-    all_posts.extend(latest_batch)
-    oldest_post_id = latest_batch[0]['post_id']
-    
+# ==============================================================================
+# SECTION 1B: LOCAL POST STORE (SQLite)
+# ==============================================================================
+# Each channel is archived in its own SQLite file. Posts are only ever appended
+# (or replaced by post_id), so an update costs O(new posts) instead of rewriting
+# the whole history, and the latest post_id is a primary-key lookup. The only
+# exception are recent posts that were edited or deleted on the server, which a
+# rescan replaces or removes in place (see rescan_recent_posts).
+#
+# A store in the compact layout keeps a row for every post but drops the raw API
+# payload, and only keeps the message of game share candidates (the prefixes of the
+# registered games, see get_candidate_prefixes) in the posts table. Every other message is moved, zlib-compressed, to a sidecar
+# file (data_channel-<id>.messages.sqlite3) so it can be promoted back if the
+# candidate prefixes change.
+
+# The fields the pipeline reads from a post. Stored posts are read back as these
+# tuples instead of decoding the raw API payload into a dict.
+Post = namedtuple('Post', 'post_id create_at creator_id message')
+
+def make_post(api_post):
+    """Projects a post dict as returned by the API onto a Post."""
+    return Post(api_post['post_id'], api_post.get('create_at', 0), api_post.get('creator_id'), api_post.get('message'))
+
+POST_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    post_id    INTEGER PRIMARY KEY,
+    create_at  INTEGER NOT NULL,
+    creator_id INTEGER,
+    message    TEXT,
+    raw        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_create_at ON posts (create_at, post_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+def get_post_store_filename(channel_id):
+    """Generates the local post store filename for a given channel."""
+    return f"data_channel-{channel_id}.sqlite3"
+
+MESSAGE_SIDECAR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sidecar.messages (
+    post_id INTEGER PRIMARY KEY,
+    message BLOB NOT NULL
+);
+"""
+
+def get_message_sidecar_filename(channel_id):
+    """Generates the filename of the compressed message sidecar of a compact post store."""
+    return f"data_channel-{channel_id}.messages.sqlite3"
+
+def open_post_store(channel_id, check_same_thread=True):
+    """
+    Opens the post store for a given channel, creating it if needed.
+    A legacy JSON archive is migrated into the store the first time it is opened.
+    With COMPACT_POST_STORE set, a store in the full layout is converted to the compact one.
+    Pass check_same_thread=False for a long-lived store that different threads use one at a time.
+    """
+    store = sqlite3.connect(get_post_store_filename(channel_id), check_same_thread=check_same_thread)
+    store.execute("PRAGMA journal_mode=WAL")
+    store.executescript(POST_STORE_SCHEMA)
+    compact = is_compact_store(store)
+    if compact or COMPACT_POST_STORE:
+        store.execute("ATTACH DATABASE ? AS sidecar", (get_message_sidecar_filename(channel_id),))
+        store.executescript(MESSAGE_SIDECAR_SCHEMA)
+    if compact:
+        refresh_store_candidates(channel_id, store)
+    elif COMPACT_POST_STORE:
+        compact_post_store(channel_id, store)
+    if get_latest_post_id(store) is None:
+        migrate_legacy_json_posts(channel_id, store)
+    return store
+
+def is_compact_store(store):
+    """Returns True if the store uses the compact layout."""
+    return get_store_meta(store, 'layout') == 'compact'
+
+def is_candidate_message(message):
+    """Returns True if a compact store keeps this message in its posts table."""
+    return any(prefix in message for prefix in get_candidate_prefixes())
+
+def compact_post_store(channel_id, store, batch_size=10000):
+    """
+    Converts a store to the compact layout: the raw payloads are dropped and the messages that are not
+    game share candidates move to the compressed sidecar. The file is vacuumed afterwards.
+    """
+    filename = get_post_store_filename(channel_id)
+    size_before = os.path.getsize(filename)
+    moved, last_post_id = 0, -1
+    with store:
+        while True:
+            rows = store.execute(
+                "SELECT post_id, message FROM posts WHERE post_id > ? ORDER BY post_id LIMIT ?", (last_post_id, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            last_post_id = rows[-1][0]
+            sidecar_rows = [(post_id, zlib.compress(message.encode('utf-8')))
+                            for post_id, message in rows if message and not is_candidate_message(message)]
+            store.executemany("INSERT OR REPLACE INTO sidecar.messages (post_id, message) VALUES (?, ?)", sidecar_rows)
+            store.executemany("UPDATE posts SET message = NULL WHERE post_id = ?", [(post_id,) for post_id, _ in sidecar_rows])
+            moved += len(sidecar_rows)
+        store.execute("UPDATE posts SET raw = ''")
+        store.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('layout', 'compact')")
+        store.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('candidate_prefixes', ?)", (json.dumps(get_candidate_prefixes()),))
+    if moved:
+        store.execute("VACUUM")
+        store.execute("PRAGMA wal_checkpoint(TRUNCATE)")  # Otherwise the file only shrinks at the next checkpoint.
+        print(f"[channel {channel_id}] Compacted {filename}: {size_before / 1e6:.1f} MB -> {os.path.getsize(filename) / 1e6:.1f} MB "
+              f"({moved} message(s) moved to {get_message_sidecar_filename(channel_id)}).")
+
+def refresh_store_candidates(channel_id, store):
+    """
+    Promotes sidecar messages back into the posts table of a compact store when the candidate prefixes
+    have changed since the store was written (a game was registered), so that reparsing sees them.
+    """
+    prefixes_json = json.dumps(get_candidate_prefixes())
+    if get_store_meta(store, 'candidate_prefixes') == prefixes_json:
+        return
+    promoted = []
+    for post_id, blob in store.execute("SELECT post_id, message FROM sidecar.messages"):
+        message = zlib.decompress(blob).decode('utf-8')
+        if is_candidate_message(message):
+            promoted.append((message, post_id))
+    with store:
+        store.executemany("UPDATE posts SET message = ? WHERE post_id = ?", promoted)
+        store.executemany("DELETE FROM sidecar.messages WHERE post_id = ?", [(post_id,) for _, post_id in promoted])
+        store.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('candidate_prefixes', ?)", (prefixes_json,))
+    if promoted:
+        print(f"[channel {channel_id}] Candidate prefixes changed: {len(promoted)} message(s) restored from the sidecar.")
+
+def migrate_legacy_json_posts(channel_id, store):
+    """One-shot import of a legacy data_channel-{id}.json archive into the post store."""
+    legacy_filename = get_local_data_filename(channel_id)
+    if not os.path.exists(legacy_filename):
+        return 0
+    with METRICS.stage("legacy_json_load", channel=channel_id):
+        legacy_posts = load_local_posts(channel_id)
+    if not legacy_posts:
+        return 0
+    append_posts(store, legacy_posts)
+    set_store_meta(store, 'migrated_from', legacy_filename)
+    print(f"Migrated {len(legacy_posts)} messages from {legacy_filename} into {get_post_store_filename(channel_id)}.")
+    print("(The legacy file is no longer used and can be deleted.)")
+    return len(legacy_posts)
+
+def get_store_meta(store, key, default=None):
+    """Reads a value from the store's meta table."""
+    row = store.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+def set_store_meta(store, key, value):
+    """Writes a value to the store's meta table."""
+    with store:
+        store.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+def append_posts(store, posts):
+    """
+    Appends posts (API dicts) to the store. A post that is already stored is replaced by the newer copy.
+    Compact stores keep no raw payload and send the messages of non-candidates to the sidecar.
+    """
+    if not is_compact_store(store):
+        rows = [
+            (post['post_id'], post.get('create_at', 0), post.get('creator_id'), post.get('message'),
+             json.dumps(post, ensure_ascii=False, separators=(',', ':')))
+            for post in posts
+        ]
+        sidecar_rows = candidate_ids = ()
+    else:
+        rows, sidecar_rows, candidate_ids = [], [], []
+        for post in posts:
+            message = post.get('message')
+            if message and not is_candidate_message(message):
+                sidecar_rows.append((post['post_id'], zlib.compress(message.encode('utf-8'))))
+                message = None
+            elif message:
+                candidate_ids.append((post['post_id'],))
+            rows.append((post['post_id'], post.get('create_at', 0), post.get('creator_id'), message, ''))
+    with store:
+        store.executemany(
+            "INSERT OR REPLACE INTO posts (post_id, create_at, creator_id, message, raw) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        if sidecar_rows:
+            store.executemany("INSERT OR REPLACE INTO sidecar.messages (post_id, message) VALUES (?, ?)", sidecar_rows)
+        if candidate_ids:
+            # An edited post may have become a candidate since it was first stored.
+            store.executemany("DELETE FROM sidecar.messages WHERE post_id = ?", candidate_ids)
+    return len(rows)
+
+def get_latest_post_id(store):
+    """Returns the newest stored post_id, or None if the store is empty."""
+    return store.execute("SELECT MAX(post_id) FROM posts").fetchone()[0]
+
+def delete_posts(store, post_ids):
+    """Removes posts that were deleted on the server from the store (and from the sidecar of a compact store)."""
+    rows = [(post_id,) for post_id in post_ids]
+    with store:
+        store.executemany("DELETE FROM posts WHERE post_id = ?", rows)
+        if is_compact_store(store):
+            store.executemany("DELETE FROM sidecar.messages WHERE post_id = ?", rows)
+    return len(rows)
+
+def get_stored_posts_since(store, since_create_at, up_to_post_id):
+    """
+    Returns {post_id: Post} for the stored posts created at or after `since_create_at` with IDs up to
+    `up_to_post_id`, with the full message even where a compact store keeps it in the sidecar.
+    """
+    posts = {row[0]: Post._make(row) for row in store.execute(
+        "SELECT post_id, create_at, creator_id, message FROM posts WHERE create_at >= ? AND post_id <= ?", (since_create_at, up_to_post_id))}
+    if is_compact_store(store):
+        for post_id, blob in store.execute("""
+                SELECT m.post_id, m.message FROM sidecar.messages m JOIN posts p ON p.post_id = m.post_id
+                WHERE p.create_at >= ? AND p.post_id <= ?
+            """, (since_create_at, up_to_post_id)):
+            posts[post_id] = posts[post_id]._replace(message=zlib.decompress(blob).decode('utf-8'))
+    return posts
+
+def iter_creator_posts(store, creator_id, since_create_at, before_create_at):
+    """Yields one player's stored posts created in [`since_create_at`, `before_create_at`) as Post tuples, in store order."""
+    yield from map(Post._make, store.execute("""
+        SELECT post_id, create_at, creator_id, message FROM posts
+        WHERE create_at >= ? AND create_at < ? AND creator_id = ? ORDER BY create_at, post_id
+    """, (since_create_at, before_create_at, creator_id)))
+
+def get_local_date(create_at):
+    """Returns the local calendar date (ISO) of a post timestamp, the day its score counts for."""
+    return datetime.fromtimestamp(create_at / 1000).date().isoformat()
+
+def get_sync_cursor(store):
+    """
+    Returns the channel's persisted sync cursor: the post_id and create_at of the newest post the last sync
+    stored, and when its recent posts were last rescanned (Unix time). None before the first update.
+    """
+    cursor = get_store_meta(store, 'sync_cursor')
+    return json.loads(cursor) if cursor else None
+
+def set_sync_cursor(store, cursor):
+    """Persists the channel's sync cursor (see get_sync_cursor)."""
+    set_store_meta(store, 'sync_cursor', json.dumps(cursor))
+
+def get_rescore_days(store):
+    """Returns the queued (creator_id, date) pairs whose score records must be re-derived (see rescore_queued_days)."""
+    return {tuple(day) for day in json.loads(get_store_meta(store, 'rescore_days', '[]'))}
+
+def queue_rescore_days(store, player_days):
+    """Adds (creator_id, date) pairs to the store's rescore queue."""
+    set_store_meta(store, 'rescore_days', json.dumps(sorted(get_rescore_days(store) | set(player_days))))
+
+def clear_rescore_days(store):
+    """Empties the store's rescore queue once the score state has caught up with it."""
+    with store:
+        store.execute("DELETE FROM meta WHERE key = 'rescore_days'")
+
+def get_stored_post_count(store, after_post_id=None):
+    """Returns the number of posts in the store, optionally only those newer than `after_post_id`."""
+    if after_post_id is None:
+        return store.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+    return store.execute("SELECT COUNT(*) FROM posts WHERE post_id > ?", (after_post_id,)).fetchone()[0]
+
+def iter_stored_posts(store, after_post_id=None, up_to_post_id=None):
+    """
+    Yields the stored posts one at a time as Post tuples, ordered by creation time, optionally
+    restricted to post IDs in (`after_post_id`, `up_to_post_id`].
+    """
+    conditions, params = [], []
+    if after_post_id is not None:
+        conditions.append("post_id > ?"); params.append(after_post_id)
+    if up_to_post_id is not None:
+        conditions.append("post_id <= ?"); params.append(up_to_post_id)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    yield from map(Post._make, store.execute(
+        f"SELECT post_id, create_at, creator_id, message FROM posts{where} ORDER BY create_at, post_id", params))
+
+def get_post_order(post):
+    """Sort key of the post stores: creation time, then post ID for posts created in the same millisecond."""
+    return (post.create_at, post.post_id)
+
+def iter_merged_posts(streams):
+    """
+    Lazily k-way merges post streams that are each ordered by get_post_order (as iter_stored_posts yields
+    them) into one globally ordered stream. Only one pending post per stream is held in memory.
+    """
+    return heapq.merge(*streams, key=get_post_order)
+
+def get_store_path(store):
+    """Returns the absolute path of the database file behind a store connection."""
+    return store.execute("PRAGMA database_list").fetchone()[2]
+
+def iter_post_id_ranges(store, after_post_id=None, chunk_size=PARSE_CHUNK_POSTS):
+    """Splits the stored posts newer than `after_post_id` into (after, up_to] post ID ranges of `chunk_size` posts."""
+    lower = after_post_id
+    while True:
+        row = store.execute(
+            "SELECT post_id FROM posts WHERE post_id > ? ORDER BY post_id LIMIT 1 OFFSET ?",
+            (lower if lower is not None else -1, chunk_size - 1)
+        ).fetchone()
+        if row is None:
+            yield lower, None
+            return
+        yield lower, row[0]
+        lower = row[0]
+
+
+# ==============================================================================
+# SECTION 1C: CHANNEL SYNCHRONISATION
+# ==============================================================================
+
+def iter_prefetched(items, max_ahead=BACKFILL_PREFETCH_BATCHES):
+    """
+    Consumes an iterable in a background thread and yields its items in order, so that
+    producing the next item (e.g. fetching a page) overlaps with the caller's work on the current one.
+    """
+    pending = queue.Queue(maxsize=max_ahead)
+    stop = threading.Event()
+    end_marker = object()
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                pending.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+            put((end_marker, None))
+        except Exception as e:
+            put((end_marker, e))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = pending.get()
+            if item is end_marker:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+def iter_history_batches(channel_id, before_post_id=None):
+    """
+    Yields batches of posts walking backwards through a channel's history, newest first.
+    Starts from the latest message, or from `before_post_id` when resuming a backfill.
+    The page size adapts to the server's response time. API failures raise ChatAPIError.
+    """
+    page_size = AdaptivePageSize()
+    oldest_post_id = before_post_id
+    if oldest_post_id is None:
+        latest_batch = fetch_message_batch(channel_id, prev_count=page_size.size, next_count=0)
+        if not latest_batch:
+            print(f"[channel {channel_id}] The channel has no messages.")
+            return
+        yield latest_batch
+        oldest_post_id = latest_batch[0]['post_id']
+
     while True:
-        print(f"Fetching messages before post ID: {oldest_post_id}...")
-        batch = fetch_message_batch(channel_id, post_id=oldest_post_id, prev_count=100, next_count=0)
+        print(f"[channel {channel_id}] Fetching {page_size.size} messages before post ID: {oldest_post_id}...")
+        batch = fetch_adaptive_page(channel_id, page_size, post_id=oldest_post_id)
         
         if not batch:
-            print("Reached the beginning of the channel history.")
-            break
+            print(f"[channel {channel_id}] Reached the beginning of the channel history.")
+            return
             
         new_oldest_id = batch[0]['post_id']
         if new_oldest_id == oldest_post_id:
-            print("API returned the same oldest post ID, assuming end of history.")
-            break
+            print(f"[channel {channel_id}] API returned the same oldest post ID, assuming end of history.")
+            return
 
-        all_posts.extend(batch)
+        # The page ends with the anchor post itself, which has already been yielded.
+        yield [p for p in batch if p['post_id'] != oldest_post_id]
         oldest_post_id = new_oldest_id
-        time.sleep(0.5)
 
-    save_local_posts(channel_id, all_posts)
-    return all_posts
+def download_full_channel_history(channel_id, store):
+    """
+    Downloads the entire message history for a given channel into its post store.
+    Pages are fetched in a background thread while the previous page is written to disk and parsed.
+    Progress is checkpointed after every page, so an interrupted download resumes where it stopped.
+    Returns the (create_at, record) pairs of the game results found in the downloaded posts.
+    """
+    records = []
+    resume_from = get_store_meta(store, 'backfill_oldest_post_id')
+    if resume_from is not None:
+        resume_from = int(resume_from)
+        print(f"[channel {channel_id}] Resuming interrupted download before post ID: {resume_from}...")
+        records.extend(parse_game_posts(iter_stored_posts(store)))
+    else:
+        print(f"[channel {channel_id}] Starting full download...")
+
+    downloaded = 0
+    for batch in iter_prefetched(iter_history_batches(channel_id, before_post_id=resume_from)):
+        METRICS.count("batches_total", channel=channel_id)
+        append_posts(store, batch)
+        set_store_meta(store, 'backfill_oldest_post_id', batch[0]['post_id'])
+        downloaded += len(batch)
+        records.extend(parse_game_posts(map(make_post, batch)))
+
+    if downloaded or resume_from is not None:
+        with store:
+            store.execute("DELETE FROM meta WHERE key = 'backfill_oldest_post_id'")
+    print(f"Successfully saved {get_stored_post_count(store)} total messages to {get_post_store_filename(channel_id)}")
+    return records
+
+def iter_recent_batches(channel_id, anchor_post_id, since_create_at):
+    """
+    Yields batches of posts walking backwards from `anchor_post_id` (included) until posts older than
+    `since_create_at` are reached, newest first. Only the posts created since then are yielded.
+    The page size adapts to the server's response time. API failures raise ChatAPIError.
+    """
+    page_size = AdaptivePageSize()
+    oldest_post_id, include_anchor = anchor_post_id, True
+    while True:
+        batch = fetch_adaptive_page(channel_id, page_size, post_id=oldest_post_id)
+
+        # Only the first page keeps the anchor; the later ones end with a post already yielded.
+        batch = [p for p in batch if p['post_id'] < oldest_post_id or (include_anchor and p['post_id'] == oldest_post_id)]
+        include_anchor = False
+        recent = [p for p in batch if p.get('create_at', 0) >= since_create_at]
+        if recent:
+            yield recent
+        if len(recent) < len(batch) or not batch or batch[0]['post_id'] == oldest_post_id:
+            return
+        oldest_post_id = batch[0]['post_id']
+
+def is_rescan_due(store):
+    """Returns True if the store's recent posts should be checked for edits and deletions again."""
+    cursor = get_sync_cursor(store)
+    return SYNC_RESCAN_HOURS > 0 and time.time() - (cursor or {}).get('rescanned_at', 0) >= SYNC_RESCAN_MIN_INTERVAL
+
+def rescan_recent_posts(channel_id, store, cursor):
+    """
+    Re-fetches the posts created in the SYNC_RESCAN_HOURS up to the sync cursor and applies what changed on
+    the server in place: edited (or missing) posts are written again and deleted ones are removed from the store.
+    The (creator_id, date) pairs of the game shares among them are queued for rescore_queued_days first, so an
+    interrupted rescan cannot leave the scores behind the store. Returns (edited, deleted).
+    """
+    since = cursor['create_at'] - SYNC_RESCAN_HOURS * 3600 * 1000
+    stored = get_stored_posts_since(store, since, cursor['post_id'])
+    edited, seen = [], set()
+    for batch in iter_recent_batches(channel_id, cursor['post_id'], since):
+        METRICS.count("batches_total", channel=channel_id)
+        for post in batch:
+            seen.add(post['post_id'])
+            old = stored.get(post['post_id'])
+            if old is None or (old.creator_id, old.message) != (post.get('creator_id'), post.get('message')):
+                edited.append(post)
+    deleted = [post for post_id, post in stored.items() if post_id not in seen]
+
+    # Both versions of an edited post count: the old one may have been a score, the new one may be one.
+    affected = deleted + [stored[post['post_id']] for post in edited if post['post_id'] in stored] + list(map(make_post, edited))
+    player_days = {(post.creator_id, get_local_date(post.create_at))
+                   for post in affected if post.creator_id and post.message and is_candidate_message(post.message)}
+    if player_days:
+        queue_rescore_days(store, player_days)
+    if edited:
+        append_posts(store, edited)
+    if deleted:
+        delete_posts(store, [post.post_id for post in deleted])
+    METRICS.count("posts_edited_total", len(edited), channel=channel_id)
+    METRICS.count("posts_deleted_total", len(deleted), channel=channel_id)
+    return len(edited), len(deleted)
+
+def update_channel_history(channel_id, store):
+    """
+    Appends new messages for a given channel to its post store, paging forward from the newest stored post,
+    then rescans recent posts for edits and deletions when one is due, and moves the sync cursor.
+    If a full download had to run first, returns the (create_at, record) pairs it parsed, otherwise None.
+    """
+    print(f"[channel {channel_id}] Checking for updates...")
+    latest_post_id = get_latest_post_id(store)
+    if latest_post_id is None:
+        print(f"[channel {channel_id}] No local data found. Running initial download instead.")
+        return download_full_channel_history(channel_id, store)
+
+    records = None
+    if get_store_meta(store, 'backfill_oldest_post_id') is not None:
+        records = download_full_channel_history(channel_id, store)
+        latest_post_id = get_latest_post_id(store)
 
-def update_channel_history(channel_id):
-    """Updates the local channel archive with new messages for a given channel."""
-    print(f"Checking for updates for channel ID: {channel_id}...")
-    existing_posts = load_local_posts(channel_id)
-    if not existing_posts:
-        print(f"No local data found for channel {channel_id}. Running initial download instead.")
-        return download_full_channel_history(channel_id)
+    cursor = get_sync_cursor(store) or {}
+    if cursor.get('post_id') != latest_post_id:
+        # First update of this store, or it changed since (a full download, a deleted post): restart from its newest post.
+        cursor = {'post_id': latest_post_id, 'create_at': store.execute("SELECT create_at FROM posts WHERE post_id = ?", (latest_post_id,)).fetchone()[0],
+                  'rescanned_at': cursor.get('rescanned_at', 0)}
 
-    latest_post_id = existing_posts[-1]['post_id']
     new_posts = []
+    page_size = AdaptivePageSize()
     
     while True:
-        print(f"Fetching messages after post ID: {latest_post_id}...")
-        batch = fetch_message_batch(channel_id, post_id=latest_post_id, prev_count=0, next_count=100)
+        print(f"[channel {channel_id}] Fetching {page_size.size} messages after post ID: {latest_post_id}...")
+        batch = fetch_adaptive_page(channel_id, page_size, post_id=latest_post_id, forward=True)
 
-        if not batch:
-            break
-        
+        # The page starts with the anchor post itself, which is already stored.
         batch = [p for p in batch if p['post_id'] > latest_post_id]
+        # Only an empty page ends the history: the server may return fewer posts than asked.
         if not batch:
             break
 
+        # Saved page by page, so a failure further on does not lose the pages already fetched.
+        METRICS.count("batches_total", channel=channel_id)
+        append_posts(store, batch)
         new_posts.extend(batch)
         latest_post_id = batch[-1]['post_id']
-        time.sleep(0.5)
 
     if new_posts:
-        print(f"Found {len(new_posts)} new message(s).")
-        all_posts = existing_posts + new_posts
-        save_local_posts(channel_id, all_posts)
-        return all_posts
+        print(f"[channel {channel_id}] Found {len(new_posts)} new message(s).")
+        print(f"Successfully saved {len(new_posts)} new messages to {get_post_store_filename(channel_id)}")
     else:
-        print("Channel is already up-to-date.")
-        return existing_posts
+        print(f"[channel {channel_id}] Channel is already up-to-date.")
+
+    if is_rescan_due(store):
+        edited, deleted = rescan_recent_posts(channel_id, store, cursor)
+        cursor['rescanned_at'] = time.time()
+        if edited or deleted:
+            print(f"[channel {channel_id}] Rescanned the last {SYNC_RESCAN_HOURS:g}h: {edited} edited and {deleted} deleted message(s) applied.")
+    if new_posts:
+        cursor.update(post_id=new_posts[-1]['post_id'], create_at=new_posts[-1].get('create_at', 0))
+    set_sync_cursor(store, cursor)
+
+    if records is not None:
+        records.extend(parse_game_posts(map(make_post, new_posts)))
+    return records
+
+def poll_channel(channel_id, store):
+    """
+    Cheaply checks whether a channel has posts newer than its store (one small request) and, if so,
+    pulls them in. A due rescan for edits and deletions runs even without new posts.
+    Returns (found new posts or score changes, update_channel_history result).
+    """
+    latest_post_id = get_latest_post_id(store)
+    if latest_post_id is None:
+        return True, update_channel_history(channel_id, store)
+    probe = fetch_message_batch(channel_id, post_id=latest_post_id, prev_count=0, next_count=1)
+    if not any(p['post_id'] > latest_post_id for p in probe) and not is_rescan_due(store):
+        return False, None
+    result = update_channel_history(channel_id, store)
+    return get_latest_post_id(store) != latest_post_id or bool(get_rescore_days(store)), result
+
+def sync_channel(channel_id, full_download=False):
+    """Downloads or updates one channel's post store. Runs inside a fetch thread."""
+    store = open_post_store(channel_id)
+    try:
+        with METRICS.stage("sync", channel=channel_id):
+            if full_download:
+                return download_full_channel_history(channel_id, store)
+            return update_channel_history(channel_id, store)
+    finally:
+        store.close()
+
+def sync_all_channels(channel_ids, full_download=False, max_threads=FETCH_THREADS):
+    """
+    Synchronises all channels in parallel, sharing one HTTP session and one rate limit.
+    Returns a dict of channel ID -> the sync result (see update_channel_history) for the channels that succeeded.
+    A rejected session or token raises ChatAuthError, since every channel would fail the same way.
+    """
+    parsed_records = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_threads, len(channel_ids)))) as pool:
+        futures = {pool.submit(sync_channel, channel_id, full_download): channel_id for channel_id in channel_ids}
+        for future in as_completed(futures):
+            channel_id = futures[future]
+            try:
+                parsed_records[channel_id] = future.result()
+            except ChatAuthError as e:
+                # Regenerating the dashboards from stale data would hide expired credentials from a cron job.
+                print(f"[channel {channel_id}] Authentication failed: {e} Update SYNO_TOKEN and COOKIE_STRING. Stopping.")
+                raise
+            except Exception as e:
+                print(f"[channel {channel_id}] Synchronisation failed: {e}")
+    return parsed_records
 
 
 # ==============================================================================
-# SECTION 2: TIMEGUESSR DATA PROCESSING
+# SECTION 2: GAME RESULT PARSING
 # ==============================================================================
+# Every daily game is registered with a cheap substring `prefix` and a `parse_message`
+# function that returns (game_number, total_score, rounds) or None. One pass over the
+# posts hands each message only to the games whose prefix it contains, so all games
+# share a single fetch and a single scan. Rounds are dicts of per-round sub-scores;
+# the dashboards average their `location_score` and `date_score` (absent keys count as 0).
+
+Game = namedtuple('Game', 'key title prefix parse_message')
+GAMES = {}  # key -> Game, in registration order
+
+def register_game(key, title, prefix, parse_message):
+    """Adds a game to the registry. Bump SCORE_STATE_VERSION so stored posts are reparsed for it."""
+    GAMES[key] = Game(key, title, prefix, parse_message)
+
+def get_candidate_prefixes():
+    """Returns the prefixes of all registered games."""
+    return [game.prefix for game in GAMES.values()]
+
 
 def get_emoji_score(emojis):
     """Calculates the score from a string of three emojis."""
     return emojis.count('🟩') * 2 + emojis.count('🟨') * 1
 
-def process_timeguessr_scores(posts):
+@lru_cache(maxsize=4096)
+def get_round_scores(loc, date_emojis):
     """
-    Processes raw post data into structured TimeGuessr scores.
-    It only takes the FIRST score a player submits on a given day.
+    Scores one round from the raw text captured around 🌎 and 📅. Returns (location_score, date_score),
+    or None if either side is not exactly three emojis. Cached, as only a few hundred distinct rounds exist.
     """
-    processed_results = []
-    processed_player_days = set() # Tracks (creator_id, date) to ensure uniqueness
+    loc = loc.strip().replace('\ufe0f', '')
+    date_emojis = date_emojis.strip().replace('\ufe0f', '')
+    if len(loc) != 3 or len(date_emojis) != 3:
+        return None
+    return get_emoji_score(loc), get_emoji_score(date_emojis)
 
-    print("\nProcessing TimeGuessr data from all channels...")
-    timeguessr_posts = [p for p in posts if 'message' in p and TIMEGUESSR_REGEX.search(p['message'])]
-    print(f"Found {len(timeguessr_posts)} potential TimeGuessr posts.")
-    
-    for post in timeguessr_posts:
-        message, post_id = post.get("message", ""), post.get("post_id")
-        creator_id, create_at = post.get("creator_id"), post.get("create_at", 0)
-        
-        dt_object = datetime.fromtimestamp(create_at / 1000)
-        game_date = dt_object.date().isoformat()
-        
-        if (creator_id, game_date) in processed_player_days:
+def parse_timeguessr_message(message):
+    """
+    Extracts (game_number, total_score, rounds) from a TimeGuessr share in a single pass
+    over the message, or returns None if it is not a complete result with five rounds.
+    """
+    if TIMEGUESSR_PREFIX not in message:
+        return None
+    header = TIMEGUESSR_REGEX.search(message)
+    if header is None:
+        return None
+
+    rounds = []
+    for loc, date_emojis in TIMEGUESSR_ROUND_REGEX.findall(message, header.end()):
+        scores = get_round_scores(loc, date_emojis)
+        if scores is not None:
+            rounds.append({"location_score": scores[0], "date_score": scores[1]})
+
+    if len(rounds) != 5:
+        return None
+    return int(header.group(1)), int(header.group(2).replace(',', '')), rounds
+
+register_game('timeguessr', 'TimeGuessr', TIMEGUESSR_PREFIX, parse_timeguessr_message)
+
+def parse_game_post(game, post):
+    """Parses a single Post into a score record of `game`. Returns None if it is not a valid result."""
+    parsed = game.parse_message(post.message or "")
+    creator_id = post.creator_id
+    if parsed is None or not creator_id:
+        return None
+
+    game_number, total_score, rounds = parsed
+    return {
+        "game": game.key, "post_id": post.post_id, "datetime": datetime.fromtimestamp(post.create_at / 1000).isoformat(),
+        "creator_id": creator_id, "game_number": game_number, "total_score": total_score,
+        "rounds": rounds
+    }
+
+def iter_game_results(posts):
+    """
+    Lazily parses a stream of Posts in one pass, dispatching each message to the registered games whose
+    prefix it contains. Yields (create_at, record) pairs for the valid results in stream order.
+    """
+    games = tuple(GAMES.values())
+    scanned = 0
+    matched = dict.fromkeys(GAMES, 0)
+    try:
+        for scanned, post in enumerate(posts, 1):
+            message = post.message
+            if not message:
+                continue
+            for game in games:
+                if game.prefix not in message:
+                    continue  # Most chat messages stop here, before any regex or function call.
+                record = parse_game_post(game, post)
+                if record is not None:
+                    matched[game.key] += 1
+                    yield post.create_at, record
+    finally:
+        METRICS.count("posts_scanned_total", scanned)
+        for key, count in matched.items():
+            METRICS.count("posts_matched_total", count, game=key)
+
+def parse_game_posts(posts):
+    """Parses a batch of Posts, returning (create_at, record) pairs for the valid results of every game."""
+    return list(iter_game_results(posts))
+
+def parse_post_store_range(store_path, after_post_id, up_to_post_id):
+    """Worker entry point for --workers: parses the posts of one store with IDs in (after_post_id, up_to_post_id]."""
+    store = sqlite3.connect(store_path)
+    try:
+        return parse_game_posts(iter_stored_posts(store, after_post_id=after_post_id, up_to_post_id=up_to_post_id))
+    finally:
+        store.close()
+
+def parse_stored_posts(store, after_post_id=None, executor=None):
+    """
+    Parses the stored posts newer than `after_post_id` into (create_at, record) pairs.
+    With a process pool `executor`, the posts are sharded into post ID ranges that the workers
+    read and parse on their own; the shards are concatenated in order, so the result is deterministic.
+    """
+    if executor is None:
+        return parse_game_posts(iter_stored_posts(store, after_post_id=after_post_id))
+    ranges = list(iter_post_id_ranges(store, after_post_id))
+    store_path = get_store_path(store)
+    parsed = []
+    for shard in executor.map(parse_post_store_range, [store_path] * len(ranges), *zip(*ranges)):
+        parsed.extend(shard)
+    # The workers' own counters stay in their processes, so count the shards here.
+    METRICS.count("posts_scanned_total", get_stored_post_count(store, after_post_id))
+    for key in GAMES:
+        METRICS.count("posts_matched_total", sum(1 for _, record in parsed if record["game"] == key), game=key)
+    return parsed
+
+def iter_first_scores_of_day(parsed):
+    """
+    Keeps only the FIRST score a player submits on a given day, for each game.
+    `parsed` must be (create_at, record) pairs in chronological order (any iterable); the kept pairs are yielded.
+    """
+    processed_player_days = set() # Tracks (game, creator_id, date) to ensure uniqueness
+    for create_at, record in parsed:
+        player_day = (record["game"], record["creator_id"], record["datetime"].split('T')[0])
+        if player_day in processed_player_days:
             continue
+        processed_player_days.add(player_day)
+        yield create_at, record
 
-        score_match = re.search(r'([\d,]+)/50,000', message)
-        if not all([creator_id, score_match]): continue
-        
-        rounds = []
-        variation_selector = '\ufe0f'
-        for line in message.split('\n'):
-            if not line.strip().startswith('🌎'): continue
-            round_match = re.search(r'🌎(.*?)\s+📅(.*)', line.strip())
-            if round_match:
-                loc = round_match.group(1).strip().replace(variation_selector, '')
-                date_emojis = round_match.group(2).strip().replace(variation_selector, '')
-                if len(loc) == 3 and len(date_emojis) == 3:
-                    rounds.append({"location_score": get_emoji_score(loc), "date_score": get_emoji_score(date_emojis)})
-        
-        if len(rounds) == 5:
-            processed_results.append({
-                "post_id": post_id, "datetime": dt_object.isoformat(),
-                "creator_id": creator_id, "total_score": int(score_match.group(1).replace(',', '')),
-                "rounds": rounds
-            })
-            processed_player_days.add((creator_id, game_date))
 
-    print(f"Successfully processed {len(processed_results)} valid entries (first score of the day per player).")
-    return processed_results
+# ==============================================================================
+# SECTION 2B: PERSISTED SCORE STATE
+# ==============================================================================
+# The selected score records are kept between runs, keyed by (game, creator_id, date), together
+# with a high-water mark per channel: the newest post_id that has already been parsed (for all
+# games at once). A run therefore only parses posts newer than the mark. Each player also has a
+# running aggregate per game (count, sum, min, max and round sums) that is updated in O(1) per new record.
+# The time-windowed statistics are kept the same way:
+#   - every score row carries the player's running totals (games and score up to that date), so the
+#     average over any window is the difference of two rows; the 7/30/90-day averages of each game day
+#     are stored in rolling_averages,
+#   - player_periods holds the games, score sum and best score per player and calendar week/month,
+#   - player_streaks holds the run of consecutive days ending on the player's last game and their longest run.
+# Appending a player's newest day touches a handful of rows. Days filled in before a player's
+# last one or replaced are collected per batch, and the rows after the earliest of them are redone
+# in one pass per player, so a batch costs time linear in the records and the days they shift.
+
+SCORE_STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    game       TEXT NOT NULL,
+    creator_id INTEGER NOT NULL,
+    game_date  TEXT NOT NULL,
+    create_at  INTEGER NOT NULL,
+    post_id    INTEGER NOT NULL,
+    total_score  INTEGER NOT NULL,
+    round_count  INTEGER NOT NULL,
+    location_sum INTEGER NOT NULL,
+    date_sum     INTEGER NOT NULL,
+    record     TEXT NOT NULL,
+    games_to_date INTEGER NOT NULL DEFAULT 0,
+    score_to_date INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (game, creator_id, game_date)
+);
+CREATE INDEX IF NOT EXISTS idx_scores_create_at ON scores (create_at, post_id);
+CREATE TABLE IF NOT EXISTS rolling_averages (
+    game        TEXT NOT NULL,
+    creator_id  INTEGER NOT NULL,
+    window_days INTEGER NOT NULL,
+    game_date   TEXT NOT NULL,
+    average     INTEGER NOT NULL,
+    PRIMARY KEY (game, creator_id, window_days, game_date)
+);
+CREATE TABLE IF NOT EXISTS player_periods (
+    game         TEXT NOT NULL,
+    period       TEXT NOT NULL,
+    period_start TEXT NOT NULL,
+    creator_id   INTEGER NOT NULL,
+    games        INTEGER NOT NULL,
+    score_sum    INTEGER NOT NULL,
+    best         INTEGER NOT NULL,
+    PRIMARY KEY (game, period, period_start, creator_id)
+);
+CREATE TABLE IF NOT EXISTS player_streaks (
+    game         TEXT NOT NULL,
+    creator_id   INTEGER NOT NULL,
+    streak_start TEXT NOT NULL,
+    last_date    TEXT NOT NULL,
+    longest      INTEGER NOT NULL,
+    longest_end  TEXT NOT NULL,
+    PRIMARY KEY (game, creator_id)
+);
+CREATE TABLE IF NOT EXISTS player_aggregates (
+    game         TEXT NOT NULL,
+    creator_id   INTEGER NOT NULL,
+    games        INTEGER NOT NULL,
+    score_sum    INTEGER NOT NULL,
+    score_min    INTEGER NOT NULL,
+    score_max    INTEGER NOT NULL,
+    round_count  INTEGER NOT NULL,
+    location_sum INTEGER NOT NULL,
+    date_sum     INTEGER NOT NULL,
+    PRIMARY KEY (game, creator_id)
+);
+CREATE TABLE IF NOT EXISTS channel_marks (
+    channel_id INTEGER PRIMARY KEY,
+    post_id    INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+def open_score_state(rebuild=False):
+    """
+    Opens the persisted score state. It is reset when `rebuild` is set or when it was
+    written with different parsing rules (SCORE_STATE_VERSION).
+    """
+    state = sqlite3.connect(SCORE_STATE_FILENAME)
+    state.executescript(SCORE_STATE_SCHEMA)
+    stored_version = get_store_meta(state, 'version')
+    if rebuild or stored_version != str(SCORE_STATE_VERSION):
+        if not rebuild and stored_version is not None:
+            print(f"Score state was built by an older parser (version {stored_version}). Rebuilding it.")
+        state.executescript("DROP TABLE IF EXISTS scores; DROP TABLE IF EXISTS player_aggregates; DROP TABLE IF EXISTS channel_marks; "
+                            "DROP TABLE IF EXISTS rolling_averages; DROP TABLE IF EXISTS player_periods; DROP TABLE IF EXISTS player_streaks;")
+        state.executescript(SCORE_STATE_SCHEMA)
+        set_store_meta(state, 'version', str(SCORE_STATE_VERSION))
+    return state
+
+def get_channel_mark(state, channel_id):
+    """Returns the newest post_id already parsed for a channel, or None if nothing was parsed yet."""
+    row = state.execute("SELECT post_id FROM channel_marks WHERE channel_id = ?", (channel_id,)).fetchone()
+    return row[0] if row else None
+
+def set_channel_mark(state, channel_id, post_id):
+    """Records the newest post_id parsed for a channel."""
+    with state:
+        state.execute("INSERT OR REPLACE INTO channel_marks (channel_id, post_id) VALUES (?, ?)", (channel_id, post_id))
+
+def add_to_player_aggregate(state, game, creator_id, total_score, round_count, location_sum, date_sum):
+    """Adds one game to a player's running aggregate in O(1)."""
+    state.execute("""
+        INSERT INTO player_aggregates (game, creator_id, games, score_sum, score_min, score_max, round_count, location_sum, date_sum)
+        VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (game, creator_id) DO UPDATE SET
+            games = games + 1, score_sum = score_sum + excluded.score_sum,
+            score_min = MIN(score_min, excluded.score_min), score_max = MAX(score_max, excluded.score_max),
+            round_count = round_count + excluded.round_count,
+            location_sum = location_sum + excluded.location_sum, date_sum = date_sum + excluded.date_sum
+    """, (game, creator_id, total_score, total_score, total_score, round_count, location_sum, date_sum))
+
+def recompute_player_aggregate(state, game, creator_id):
+    """Rebuilds a player's aggregate from their stored games (needed when a game is replaced, since min/max cannot be undone)."""
+    state.execute("DELETE FROM player_aggregates WHERE game = ? AND creator_id = ?", (game, creator_id))
+    state.execute("""
+        INSERT INTO player_aggregates (game, creator_id, games, score_sum, score_min, score_max, round_count, location_sum, date_sum)
+        SELECT game, creator_id, COUNT(*), SUM(total_score), MIN(total_score), MAX(total_score), SUM(round_count), SUM(location_sum), SUM(date_sum)
+        FROM scores WHERE game = ? AND creator_id = ? GROUP BY game, creator_id
+    """, (game, creator_id))
+
+def update_running_totals(state, game, creator_id, game_date, games_added, score_added):
+    """
+    Sets the running totals of the row just added or replaced at `game_date` from the previous game day,
+    shifts the totals of any later days and refreshes the rolling averages that include the day.
+    Appending a player's newest day only touches that row.
+    """
+    previous = state.execute("""
+        SELECT games_to_date, score_to_date FROM scores WHERE game = ? AND creator_id = ? AND game_date < ?
+        ORDER BY game_date DESC LIMIT 1
+    """, (game, creator_id, game_date)).fetchone() or (0, 0)
+    state.execute("""
+        UPDATE scores SET games_to_date = ? + 1, score_to_date = ? + total_score
+        WHERE game = ? AND creator_id = ? AND game_date = ?
+    """, (previous[0], previous[1], game, creator_id, game_date))
+    state.execute("""
+        UPDATE scores SET games_to_date = games_to_date + ?, score_to_date = score_to_date + ?
+        WHERE game = ? AND creator_id = ? AND game_date > ?
+    """, (games_added, score_added, game, creator_id, game_date))
+    refresh_rolling_averages(state, game, creator_id, game_date)
+
+def get_totals_up_to(state, game, creator_id, up_to_date):
+    """Returns a player's (games, score sum) over the game days up to and including `up_to_date`."""
+    row = state.execute("""
+        SELECT games_to_date, score_to_date FROM scores WHERE game = ? AND creator_id = ? AND game_date <= ?
+        ORDER BY game_date DESC LIMIT 1
+    """, (game, creator_id, up_to_date)).fetchone()
+    return row or (0, 0)
+
+def get_window_average(state, game, creator_id, end_date, window_days):
+    """Returns a player's rounded average over the `window_days` days ending on `end_date`, or None if they did not play."""
+    games, score_sum = get_totals_up_to(state, game, creator_id, end_date)
+    start = (date.fromisoformat(end_date) - timedelta(days=window_days)).isoformat()
+    games_before, score_before = get_totals_up_to(state, game, creator_id, start)
+    return round((score_sum - score_before) / (games - games_before)) if games > games_before else None
+
+def refresh_rolling_averages(state, game, creator_id, from_date):
+    """Recomputes the stored rolling averages of a player's game days whose windows include `from_date`."""
+    first_day = date.fromisoformat(from_date)
+    last_date = (first_day + timedelta(days=max(ROLLING_WINDOWS) - 1)).isoformat()
+    for (game_date,) in state.execute(
+            "SELECT game_date FROM scores WHERE game = ? AND creator_id = ? AND game_date BETWEEN ? AND ?",
+            (game, creator_id, from_date, last_date)).fetchall():
+        days_after = (date.fromisoformat(game_date) - first_day).days
+        for window_days in ROLLING_WINDOWS:
+            if days_after < window_days:
+                state.execute("INSERT OR REPLACE INTO rolling_averages (game, creator_id, window_days, game_date, average) VALUES (?, ?, ?, ?, ?)",
+                              (game, creator_id, window_days, game_date, get_window_average(state, game, creator_id, game_date, window_days)))
+
+def get_period_bounds(game_date):
+    """Returns (period, first day, first day of the next period) for the calendar week (Monday first) and month of a date."""
+    day = date.fromisoformat(game_date)
+    week_start = day - timedelta(days=day.weekday())
+    month_start = day.replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    return [("week", week_start.isoformat(), (week_start + timedelta(days=7)).isoformat()),
+            ("month", month_start.isoformat(), next_month.isoformat())]
+
+def add_to_player_periods(state, game, creator_id, game_date, total_score):
+    """Adds one game to the player's week and month in O(1)."""
+    for period, period_start, _ in get_period_bounds(game_date):
+        state.execute("""
+            INSERT INTO player_periods (game, period, period_start, creator_id, games, score_sum, best) VALUES (?, ?, ?, ?, 1, ?, ?)
+            ON CONFLICT (game, period, period_start, creator_id) DO UPDATE SET
+                games = games + 1, score_sum = score_sum + excluded.score_sum, best = MAX(best, excluded.best)
+        """, (game, period, period_start, creator_id, total_score, total_score))
+
+def recompute_player_periods(state, game, creator_id, game_date):
+    """Rebuilds the player's week and month containing `game_date` from their stored games (after a replacement)."""
+    for period, period_start, next_start in get_period_bounds(game_date):
+        state.execute("DELETE FROM player_periods WHERE game = ? AND period = ? AND period_start = ? AND creator_id = ?",
+                      (game, period, period_start, creator_id))
+        state.execute("""
+            INSERT INTO player_periods (game, period, period_start, creator_id, games, score_sum, best)
+            SELECT game, ?, ?, creator_id, COUNT(*), SUM(total_score), MAX(total_score)
+            FROM scores WHERE game = ? AND creator_id = ? AND game_date >= ? AND game_date < ? GROUP BY game, creator_id
+        """, (period, period_start, game, creator_id, period_start, next_start))
+
+def add_to_player_streak(state, game, creator_id, game_date):
+    """
+    Extends the player's streak with a new game day in O(1). A day older than their last game
+    (filled in by a channel merged later) falls back to recompute_player_streak.
+    """
+    row = state.execute("SELECT streak_start, last_date, longest, longest_end FROM player_streaks WHERE game = ? AND creator_id = ?",
+                        (game, creator_id)).fetchone()
+    if row is not None and game_date <= row[1]:
+        recompute_player_streak(state, game, creator_id)
+        return
+    streak_start, longest, longest_end = game_date, 1, game_date
+    if row is not None:
+        day = date.fromisoformat(game_date)
+        if day - date.fromisoformat(row[1]) == timedelta(days=1):
+            streak_start = row[0]
+        length = (day - date.fromisoformat(streak_start)).days + 1
+        longest, longest_end = (length, game_date) if length > row[2] else (row[2], row[3])
+    state.execute("INSERT OR REPLACE INTO player_streaks (game, creator_id, streak_start, last_date, longest, longest_end) VALUES (?, ?, ?, ?, ?, ?)",
+                  (game, creator_id, streak_start, game_date, longest, longest_end))
+
+def recompute_player_streak(state, game, creator_id):
+    """Rebuilds the player's current and longest streak from all their stored game days."""
+    streak_start = last_day = None
+    longest, longest_end = 0, None
+    for (game_date,) in state.execute("SELECT game_date FROM scores WHERE game = ? AND creator_id = ? ORDER BY game_date", (game, creator_id)).fetchall():
+        day = date.fromisoformat(game_date)
+        if last_day is None or day - last_day != timedelta(days=1):
+            streak_start = day
+        last_day = day
+        length = (day - streak_start).days + 1
+        if length > longest:
+            longest, longest_end = length, game_date
+    if last_day is not None:
+        state.execute("INSERT OR REPLACE INTO player_streaks (game, creator_id, streak_start, last_date, longest, longest_end) VALUES (?, ?, ?, ?, ?, ?)",
+                      (game, creator_id, streak_start.isoformat(), last_day.isoformat(), longest, longest_end))
+    else:
+        state.execute("DELETE FROM player_streaks WHERE game = ? AND creator_id = ?", (game, creator_id))
+
+def rebuild_player_totals(state, game, creator_id, changed_dates):
+    """
+    Redoes a player's running totals from the earliest of `changed_dates` (sorted days added out of order or
+    replaced) on, and the rolling averages of the days whose windows include one of them, in one pass over
+    their games since then. Costs one walk of the player's later games, however many days changed.
+    """
+    from_date = changed_dates[0]
+    lower = (date.fromisoformat(from_date) - timedelta(days=max(ROLLING_WINDOWS))).isoformat()
+    baseline = games, score_sum = get_totals_up_to(state, game, creator_id, lower)
+    dates, totals = [], []
+    for game_date, total_score in state.execute(
+            "SELECT game_date, total_score FROM scores WHERE game = ? AND creator_id = ? AND game_date > ? ORDER BY game_date",
+            (game, creator_id, lower)).fetchall():
+        games, score_sum = games + 1, score_sum + total_score
+        dates.append(game_date)
+        totals.append((games, score_sum))
+
+    changed_days = [date.fromisoformat(changed) for changed in changed_dates]
+    first = bisect.bisect_left(dates, from_date)
+    averages = []
+    for i in range(first, len(dates)):
+        day = date.fromisoformat(dates[i])
+        days_after = (day - changed_days[bisect.bisect_right(changed_days, day) - 1]).days
+        for window_days in ROLLING_WINDOWS:
+            if days_after < window_days:
+                j = bisect.bisect_right(dates, (day - timedelta(days=window_days)).isoformat()) - 1
+                games_before, score_before = totals[j] if j >= 0 else baseline
+                averages.append((game, creator_id, window_days, dates[i],
+                                 round((totals[i][1] - score_before) / (totals[i][0] - games_before))))
+    state.executemany("UPDATE scores SET games_to_date = ?, score_to_date = ? WHERE game = ? AND creator_id = ? AND game_date = ?",
+                      [(totals[i][0], totals[i][1], game, creator_id, dates[i]) for i in range(first, len(dates))])
+    state.executemany("INSERT OR REPLACE INTO rolling_averages (game, creator_id, window_days, game_date, average) VALUES (?, ?, ?, ?, ?)",
+                      averages)
+
+def merge_score_records(state, parsed, presorted=False):
+    """
+    Merges (create_at, record) pairs into the score state, the player aggregates and the windowed statistics. For each
+    (game, creator_id, date) the earliest record wins, so the result does not depend on the order in
+    which posts are merged. With `presorted`, `parsed` may be a lazy stream that is already in
+    (create_at, post_id) order and is consumed without being materialised.
+    A record after the player's last game day is applied in O(1). Days filled in before it or replaced shift
+    everything after them, so their running totals, rolling averages and streak are redone once per player
+    at the end of the batch (see rebuild_player_totals).
+    Returns the number of records added or replaced.
+    """
+    if not presorted:
+        parsed = sorted(parsed, key=lambda pair: (pair[0], pair[1]["post_id"]))
+    merged = 0
+    replaced_players = set()
+    changed_dates = defaultdict(set)  # (game, creator_id) -> days added out of order or replaced in this batch
+    with state:
+        for create_at, record in iter_first_scores_of_day(parsed):
+            game, creator_id, game_date, post_id = record["game"], record["creator_id"], record["datetime"].split('T')[0], record["post_id"]
+            existing = state.execute(
+                "SELECT create_at, post_id, total_score FROM scores WHERE game = ? AND creator_id = ? AND game_date = ?", (game, creator_id, game_date)
+            ).fetchone()
+            if existing is not None and existing[:2] <= (create_at, post_id):
+                continue
+            player = (game, creator_id)
+            appended = False
+            if existing is None and player not in changed_dates:
+                last_date = state.execute("SELECT MAX(game_date) FROM scores WHERE game = ? AND creator_id = ?", player).fetchone()[0]
+                appended = last_date is None or game_date > last_date
+
+            rounds = record["rounds"]
+            location_sum = sum(r.get("location_score", 0) for r in rounds)
+            date_sum = sum(r.get("date_score", 0) for r in rounds)
+            state.execute("""
+                INSERT OR REPLACE INTO scores (game, creator_id, game_date, create_at, post_id, total_score, round_count, location_sum, date_sum, record)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (game, creator_id, game_date, create_at, post_id, record["total_score"], len(rounds), location_sum, date_sum,
+                  json.dumps(record, ensure_ascii=False, separators=(',', ':'))))
+            if existing is None:
+                add_to_player_aggregate(state, game, creator_id, record["total_score"], len(rounds), location_sum, date_sum)
+                add_to_player_periods(state, game, creator_id, game_date, record["total_score"])
+            else:
+                replaced_players.add(player)
+                recompute_player_periods(state, game, creator_id, game_date)
+            if appended:
+                add_to_player_streak(state, game, creator_id, game_date)
+                update_running_totals(state, game, creator_id, game_date, 1, record["total_score"])
+            else:
+                changed_dates[player].add(game_date)
+            merged += 1
+
+        for game, creator_id in replaced_players:
+            recompute_player_aggregate(state, game, creator_id)
+        for (game, creator_id), dates in changed_dates.items():
+            rebuild_player_totals(state, game, creator_id, sorted(dates))
+            recompute_player_streak(state, game, creator_id)
+    return merged
+
+def remove_score_record(state, game, creator_id, game_date):
+    """
+    Deletes a player's record of one day (its post was edited or deleted) and takes it out of the running
+    totals, rolling averages, aggregate, periods and streak. Returns True if there was a record.
+    """
+    existing = state.execute("SELECT total_score FROM scores WHERE game = ? AND creator_id = ? AND game_date = ?",
+                             (game, creator_id, game_date)).fetchone()
+    if existing is None:
+        return False
+    state.execute("DELETE FROM scores WHERE game = ? AND creator_id = ? AND game_date = ?", (game, creator_id, game_date))
+    state.execute("DELETE FROM rolling_averages WHERE game = ? AND creator_id = ? AND game_date = ?", (game, creator_id, game_date))
+    state.execute("""
+        UPDATE scores SET games_to_date = games_to_date - 1, score_to_date = score_to_date - ?
+        WHERE game = ? AND creator_id = ? AND game_date > ?
+    """, (existing[0], game, creator_id, game_date))
+    refresh_rolling_averages(state, game, creator_id, game_date)
+    recompute_player_aggregate(state, game, creator_id)
+    recompute_player_periods(state, game, creator_id, game_date)
+    recompute_player_streak(state, game, creator_id)
+    return True
+
+def rescore_player_days(state, channel_stores, player_days):
+    """
+    Re-derives the score records of (creator_id, date) pairs whose posts were edited or deleted: their records
+    are removed for every game, then that player's posts of that day are read back from every channel in
+    `channel_stores` and merged again. Returns the number of records removed plus the number merged.
+    """
+    removed = 0
+    with state:
+        for creator_id, game_date in player_days:
+            removed += sum(remove_score_record(state, game, creator_id, game_date) for game in GAMES)
+    posts = []
+    for creator_id, game_date in player_days:
+        day_start = datetime.fromisoformat(game_date)
+        since, before = int(day_start.timestamp() * 1000), int((day_start + timedelta(days=1)).timestamp() * 1000)
+        for store in channel_stores.values():
+            posts.extend(iter_creator_posts(store, creator_id, since, before))
+    posts.sort(key=get_post_order)
+    return removed + merge_score_records(state, parse_game_posts(posts), presorted=True)
+
+def rescore_queued_days(state, channel_stores):
+    """
+    Re-derives the player days the channel syncs queued after finding edited or deleted posts (see
+    rescan_recent_posts), then empties the queues. Returns the number of records removed or merged.
+    """
+    player_days = set().union(*(get_rescore_days(store) for store in channel_stores.values()))
+    if not player_days:
+        return 0
+    with METRICS.stage("rescore"):
+        rescored = rescore_player_days(state, channel_stores, sorted(player_days))
+    for store in channel_stores.values():
+        clear_rescore_days(store)
+    print(f"Re-derived the scores of {len(player_days)} player day(s) with edited or deleted posts.")
+    METRICS.count("scores_rescored_total", rescored)
+    return rescored
+
+def parse_channel_updates(state, channel_id, store, full_history_records=None, executor=None):
+    """
+    Returns the (create_at, record) pairs one channel adds to the score state, and the post_id to move its mark
+    to. When the sync just parsed the whole channel, those records are used directly; otherwise only posts newer
+    than the mark are parsed, in parallel when a process pool `executor` is given. Returns None if nothing is new.
+    """
+    latest_post_id = get_latest_post_id(store)
+    if latest_post_id is None:
+        return None
+    if full_history_records is not None:
+        print(f"[channel {channel_id}] {len(full_history_records)} valid game result(s) parsed during the download.")
+        return full_history_records, latest_post_id
+    mark = get_channel_mark(state, channel_id)
+    if mark is not None and mark >= latest_post_id:
+        print(f"[channel {channel_id}] No new posts to parse.")
+        return None
+    with METRICS.stage("parse", channel=channel_id):
+        parsed = parse_stored_posts(store, after_post_id=mark, executor=executor)
+    scope = "all posts" if mark is None else f"posts after ID {mark}"
+    print(f"[channel {channel_id}] Parsed {scope}: {len(parsed)} valid game result(s).")
+    return parsed, latest_post_id
+
+def update_channel_scores(state, channel_stores, sync_results, executor=None):
+    """
+    Brings the score state up to date with the channels in `channel_stores` (channel ID -> store), using the
+    records their sync parsed (`sync_results`, see parse_channel_updates). All channels are merged in one
+    merge_score_records call: merged one at a time, every record of a later channel would fill in a day
+    between the ones already stored. Returns the number of records added or replaced.
+    """
+    parsed, marks = [], {}
+    for channel_id, store in channel_stores.items():
+        update = parse_channel_updates(state, channel_id, store, sync_results.get(channel_id), executor=executor)
+        if update is not None:
+            parsed.extend(update[0])
+            marks[channel_id] = update[1]
+    if not marks:
+        return 0
+    with METRICS.stage("aggregate"):
+        merged = merge_score_records(state, parsed)
+    for channel_id, post_id in marks.items():
+        set_channel_mark(state, channel_id, post_id)
+    print(f"[channels {', '.join(map(str, marks))}] {merged} result(s) merged.")
+    METRICS.count("scores_merged_total", merged)
+    return merged
+
+def update_merged_channel_scores(state, channel_stores):
+    """
+    Brings the score state up to date with several channels at once: the posts newer than each
+    channel's mark are streamed from `channel_stores` (channel ID -> store), k-way merged into global
+    time order, parsed and merged in a single pass, so memory stays flat however long the histories are.
+    Returns the number of records added or replaced.
+    """
+    pending = {}
+    for channel_id, store in channel_stores.items():
+        latest_post_id, mark = get_latest_post_id(store), get_channel_mark(state, channel_id)
+        if latest_post_id is None:
+            continue
+        if mark is not None and mark >= latest_post_id:
+            print(f"[channel {channel_id}] No new posts to parse.")
+            continue
+        pending[channel_id] = (mark, latest_post_id)
+    if not pending:
+        return 0
+
+    streams = [iter_stored_posts(channel_stores[channel_id], after_post_id=mark, up_to_post_id=latest_post_id)
+               for channel_id, (mark, latest_post_id) in pending.items()]
+    with METRICS.stage("parse_and_aggregate"):
+        merged = merge_score_records(state, iter_game_results(iter_merged_posts(streams)), presorted=True)
+    for channel_id, (mark, latest_post_id) in pending.items():
+        set_channel_mark(state, channel_id, latest_post_id)
+    print(f"[channels {', '.join(map(str, pending))}] Parsed the new posts in one merged pass: {merged} result(s) merged.")
+    METRICS.count("scores_merged_total", merged)
+    return merged
+
+def get_score_record_count(state, game=DEFAULT_GAME):
+    """Returns the number of selected score records of a game (first score of the day per player)."""
+    return state.execute("SELECT COUNT(*) FROM scores WHERE game = ?", (game,)).fetchone()[0]
 
 
 # ==============================================================================
@@ -240,53 +1599,362 @@ def get_player_name(creator_id):
     """Returns the player's name from the mapping or a default."""
     return PLAYER_NAMES.get(creator_id, f"Player {creator_id}")
 
-def create_player_data(records):
-    """Processes score records into a structured dictionary for the dashboard."""
-    player_data = defaultdict(lambda: {'scores_by_date': {}, 'all_rounds': []})
-    
-    for record in records:
-        creator_id, score = record.get('creator_id'), record.get('total_score', 0)
-        game_date = record.get('datetime', '').split('T')[0]
-        rounds = record.get('rounds', [])
-        if not all([creator_id, game_date, rounds]): continue
-        
-        player_data[creator_id]['scores_by_date'][game_date] = score
-        player_data[creator_id]['all_rounds'].extend(rounds)
+def create_player_data(state, game=DEFAULT_GAME):
+    """Builds the structured dictionary for a game's dashboard from the persisted player aggregates."""
+    player_data = {}
+    for (pid, games, score_sum, score_min, score_max, num_rounds, total_loc_score, total_date_score) in state.execute(
+            "SELECT creator_id, games, score_sum, score_min, score_max, round_count, location_sum, date_sum FROM player_aggregates "
+            "WHERE game = ? AND games > 0", (game,)):
+        player_data[pid] = {
+            'scores_by_date': {},
+            'name': get_player_name(pid),
+            'total_games': games,
+            'average_score': round(score_sum / games),
+            'high_score': score_max,
+            'low_score': score_min,
+            'avg_location_score': round(total_loc_score / num_rounds, 2) if num_rounds > 0 else 0,
+            'avg_date_score': round(total_date_score / num_rounds, 2) if num_rounds > 0 else 0,
+        }
 
+    for pid, game_date, score in state.execute("SELECT creator_id, game_date, total_score FROM scores WHERE game = ? ORDER BY game_date", (game,)):
+        player_data[pid]['scores_by_date'][game_date] = score
+
+    # Averages over the last days up to the game's latest game day, and each player's streaks.
+    latest_date = state.execute("SELECT MAX(game_date) FROM scores WHERE game = ?", (game,)).fetchone()[0]
     for pid, data in player_data.items():
-        scores = list(data['scores_by_date'].values())
-        if not scores: continue
-        
-        data['name'] = get_player_name(pid)
-        data['total_games'] = len(scores)
-        data['average_score'] = round(sum(scores) / data['total_games'])
-        data['high_score'] = max(scores)
-        data['low_score'] = min(scores) if scores else 0
-        
-        total_loc_score = sum(r['location_score'] for r in data['all_rounds'])
-        total_date_score = sum(r['date_score'] for r in data['all_rounds'])
-        num_rounds = len(data['all_rounds'])
-        
-        data['avg_location_score'] = round(total_loc_score / num_rounds, 2) if num_rounds > 0 else 0
-        data['avg_date_score'] = round(total_date_score / num_rounds, 2) if num_rounds > 0 else 0
+        for window_days in ROLLING_WINDOWS:
+            data[f'avg_{window_days}_days'] = get_window_average(state, game, pid, latest_date, window_days)
+    for pid, streak_start, last_date, longest in state.execute(
+            "SELECT creator_id, streak_start, last_date, longest FROM player_streaks WHERE game = ?", (game,)):
+        if pid in player_data:
+            player_data[pid]['current_streak'] = (date.fromisoformat(last_date) - date.fromisoformat(streak_start)).days + 1
+            player_data[pid]['streak_last_date'] = last_date
+            player_data[pid]['longest_streak'] = longest
 
-    return dict(player_data)
+    return player_data
 
-def generate_html(player_data):
-    """Generates the full HTML content for the dashboard."""
-    player_data_json = json.dumps(player_data, indent=4)
-    
-    return f"""
+# Turns an encoded payload back into the playerData object the dashboard script works with.
+# Columnar payloads store a shared day axis (days since `epoch`) and per-player arrays:
+# `days` holds delta-encoded day numbers and `scores` the matching scores.
+PLAYER_DATA_DECODER_JS = """
+        function decodePlayerData(payload) {
+            if (payload.format !== 'columnar-v1') return payload;
+            const epoch = Date.parse(payload.epoch + 'T00:00:00Z'), dayMs = 86400000, dayNames = [];
+            const dayName = n => dayNames[n] || (dayNames[n] = new Date(epoch + n * dayMs).toISOString().slice(0, 10));
+            const statKeys = Object.keys(payload.stats), playerData = {};
+            payload.ids.forEach((pid, i) => {
+                const entry = { name: payload.names[i], scores_by_date: {} }, days = payload.days[i], scores = payload.scores[i];
+                for (let j = 0, day = 0; j < days.length; j++) { day += days[j]; entry.scores_by_date[dayName(day)] = scores[j]; }
+                statKeys.forEach(key => { entry[key] = payload.stats[key][i]; });
+                playerData[pid] = entry;
+            });
+            return playerData;
+        }
+        function decodeDashboardData(payload) {
+            return { playerData: decodePlayerData(payload.players), headToHead: payload.head_to_head, dailyLeaderboards: payload.daily_leaderboards,
+                     rolling: payload.rolling || { windows: [], series: {} }, periodBests: payload.period_bests || {} };
+        }"""
+
+def encode_player_data_columnar(player_data):
+    """
+    Encodes the player data column-wise: one shared day axis, delta-encoded day numbers and
+    plain integer scores per player, and one array per stat. decodePlayerData reverses it.
+    """
+    all_dates = [d for data in player_data.values() for d in data['scores_by_date']]
+    epoch = date.fromisoformat(min(all_dates)) if all_dates else date.today()
+    stat_keys = [key for key in next(iter(player_data.values()), {}) if key not in ('name', 'scores_by_date')]
+
+    payload = {"format": "columnar-v1", "epoch": epoch.isoformat(), "ids": [], "names": [],
+               "days": [], "scores": [], "stats": {key: [] for key in stat_keys}}
+    for pid, data in player_data.items():
+        previous_day, days, scores = 0, [], []
+        for game_date, score in sorted(data['scores_by_date'].items()):
+            day = (date.fromisoformat(game_date) - epoch).days
+            days.append(day - previous_day)
+            scores.append(score)
+            previous_day = day
+        payload["ids"].append(pid)
+        payload["names"].append(data['name'])
+        payload["days"].append(days)
+        payload["scores"].append(scores)
+        for key in stat_keys:
+            payload["stats"][key].append(data.get(key))
+    return payload
+
+def encode_player_data(player_data, data_format=DEFAULT_DATA_FORMAT):
+    """Encodes the player data for the page in the requested format ('columnar' or 'json')."""
+    if data_format == 'columnar':
+        return encode_player_data_columnar(player_data)
+    return player_data
+
+def create_head_to_head(player_data):
+    """
+    Precomputes every pairwise comparison in one pass over the game days. Keys are "lowId|highId";
+    values are [common games, low wins, high wins, ties, low score sum, high score sum, low best, high best]
+    over the days both players played.
+    """
+    players_by_date = {}
+    for pid, data in player_data.items():
+        for game_date, score in data['scores_by_date'].items():
+            players_by_date.setdefault(game_date, []).append((pid, score))
+
+    head_to_head = {}
+    for entries in players_by_date.values():
+        entries.sort()
+        for i, (low_id, low_score) in enumerate(entries):
+            for high_id, high_score in entries[i + 1:]:
+                pair = head_to_head.setdefault(f"{low_id}|{high_id}", [0, 0, 0, 0, 0, 0, 0, 0])
+                pair[0] += 1
+                pair[1 if low_score > high_score else 2 if high_score > low_score else 3] += 1
+                pair[4] += low_score
+                pair[5] += high_score
+                pair[6] = max(pair[6], low_score)
+                pair[7] = max(pair[7], high_score)
+    return head_to_head
+
+def create_daily_leaderboards(player_data, days=DAILY_LEADERBOARD_DAYS):
+    """Returns {date: [[player id, score], ...]} sorted best first, for the `days` most recent game days."""
+    players_by_date = {}
+    for pid, data in player_data.items():
+        for game_date, score in data['scores_by_date'].items():
+            players_by_date.setdefault(game_date, []).append([pid, score])
+    recent_dates = sorted(players_by_date)[-days:]
+    return {d: sorted(players_by_date[d], key=lambda entry: (-entry[1], entry[0])) for d in recent_dates}
+
+def create_rolling_series(state, game=DEFAULT_GAME):
+    """
+    Returns {"windows": ROLLING_WINDOWS, "series": {player id: [[average, ...] per window]}} from the stored
+    rolling averages, with one average per game day of the player in date order (the order of scores_by_date).
+    """
+    series = {}
+    for pid, window_days, average in state.execute(
+            "SELECT creator_id, window_days, average FROM rolling_averages WHERE game = ? ORDER BY creator_id, window_days, game_date", (game,)):
+        series.setdefault(pid, {}).setdefault(window_days, []).append(average)
+    return {"windows": list(ROLLING_WINDOWS),
+            "series": {pid: [by_window.get(window_days, []) for window_days in ROLLING_WINDOWS] for pid, by_window in series.items()}}
+
+def create_period_bests(state, game=DEFAULT_GAME, counts=PERIOD_BEST_COUNTS):
+    """
+    Returns {period: {first day: [[player id, best score, games, average], ...]}} for the most recent
+    weeks and months (see PERIOD_BEST_COUNTS), oldest first, each table sorted best first.
+    """
+    period_bests = {}
+    for period, count in counts.items():
+        starts = [row[0] for row in state.execute(
+            "SELECT DISTINCT period_start FROM player_periods WHERE game = ? AND period = ? ORDER BY period_start DESC LIMIT ?", (game, period, count))]
+        tables = {period_start: [] for period_start in reversed(starts)}
+        if starts:
+            for period_start, pid, best, games, score_sum in state.execute(
+                    "SELECT period_start, creator_id, best, games, score_sum FROM player_periods WHERE game = ? AND period = ? AND period_start >= ?",
+                    (game, period, starts[-1])):
+                tables[period_start].append([pid, best, games, round(score_sum / games)])
+        for entries in tables.values():
+            entries.sort(key=lambda entry: (-entry[1], entry[0]))
+        period_bests[period] = tables
+    return period_bests
+
+def build_dashboard_payload(player_data, data_format=DEFAULT_DATA_FORMAT, state=None, game=DEFAULT_GAME):
+    """
+    Bundles the encoded player data with the precomputed head-to-head table and daily leaderboards and,
+    when the score `state` is given, the game's rolling averages and weekly/monthly bests.
+    """
+    payload = {
+        "players": encode_player_data(player_data, data_format),
+        "head_to_head": create_head_to_head(player_data),
+        "daily_leaderboards": create_daily_leaderboards(player_data),
+    }
+    if state is not None:
+        payload["rolling"] = create_rolling_series(state, game)
+        payload["period_bests"] = create_period_bests(state, game)
+    return payload
+
+def get_data_loader_js(payload=None, manifest_url=None):
+    """
+    Returns the script that hands the player data to initDashboard: either the encoded payload inlined
+    in the page, or a loader that reads the manifest and then the content-hashed data file it names.
+    """
+    if manifest_url is None:
+        if payload["players"].get("format"):
+            payload_json = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+        else:
+            payload_json = json.dumps(payload, indent=4)
+        return f"""const dashboardData = decodeDashboardData({payload_json});
+        document.addEventListener('DOMContentLoaded', () => initDashboard(dashboardData));"""
+    return f"""document.addEventListener('DOMContentLoaded', () => {{
+            fetch('{manifest_url}', {{ cache: 'no-cache' }})
+                .then(r => r.json()).then(manifest => fetch(manifest.data)).then(r => r.json())
+                .then(payload => initDashboard(decodeDashboardData(payload)))
+                .catch(err => {{ console.error(err); document.getElementById('leaderboard').textContent = 'Could not load the dashboard data.'; }});
+        }});"""
+
+# --- Offline bundle: the Tailwind utilities the page uses, compiled ahead of time ---
+# Only the part of Tailwind (v3 values) that the template needs is covered. build_utility_css scans the
+# page for class names the same way Tailwind does and emits a rule for each one it knows.
+
+TAILWIND_SCREENS = {'sm': 640, 'md': 768, 'lg': 1024, 'xl': 1280}
+TAILWIND_SPACING = {'0': '0px', '1': '0.25rem', '2': '0.5rem', '3': '0.75rem', '4': '1rem', '5': '1.25rem', '6': '1.5rem', '8': '2rem', '12': '3rem'}
+TAILWIND_COLORS = {
+    'white': '255 255 255',
+    'slate-300': '203 213 225', 'slate-400': '148 163 184', 'slate-500': '100 116 139', 'slate-600': '71 85 105',
+    'slate-700': '51 65 85', 'slate-800': '30 41 59',
+    'blue-400': '96 165 250', 'blue-500': '59 130 246', 'blue-600': '37 99 235', 'blue-700': '29 78 216',
+    'purple-400': '192 132 252', 'purple-600': '147 51 234', 'purple-700': '126 34 206',
+    'amber-300': '252 211 77', 'amber-400': '251 191 36', 'cyan-400': '34 211 238', 'fuchsia-400': '232 121 249',
+    'green-400': '74 222 128', 'red-400': '248 113 113', 'yellow-400': '250 204 21',
+}
+TAILWIND_STATIC = {  # In Tailwind's order, which decides what wins when two utilities set the same property.
+    'container': 'width: 100%', 'sticky': 'position: sticky', 'top-0': 'top: 0px', 'mx-auto': 'margin-left: auto; margin-right: auto',
+    'block': 'display: block', 'flex': 'display: flex', 'grid': 'display: grid', 'hidden': 'display: none',
+    'w-full': 'width: 100%', 'min-w-full': 'min-width: 100%', 'max-w-2xl': 'max-width: 42rem',
+    'transform': '', 'flex-col': 'flex-direction: column', 'items-end': 'align-items: flex-end', 'items-center': 'align-items: center',
+    'justify-between': 'justify-content: space-between', 'overflow-auto': 'overflow: auto', 'overflow-x-auto': 'overflow-x: auto',
+    'whitespace-nowrap': 'white-space: nowrap', 'rounded': 'border-radius: 0.25rem', 'rounded-lg': 'border-radius: 0.5rem',
+    'border': 'border-width: 1px', 'border-b': 'border-bottom-width: 1px',
+    'bg-gradient-to-r': 'background-image: linear-gradient(to right, var(--tw-gradient-stops))',
+    'text-left': 'text-align: left', 'text-center': 'text-align: center',
+    'text-xs': 'font-size: 0.75rem; line-height: 1rem', 'text-sm': 'font-size: 0.875rem; line-height: 1.25rem',
+    'text-lg': 'font-size: 1.125rem; line-height: 1.75rem', 'text-xl': 'font-size: 1.25rem; line-height: 1.75rem',
+    'text-2xl': 'font-size: 1.5rem; line-height: 2rem', 'text-4xl': 'font-size: 2.25rem; line-height: 2.5rem',
+    'text-6xl': 'font-size: 3.75rem; line-height: 1',
+    'font-medium': 'font-weight: 500', 'font-bold': 'font-weight: 700', 'font-extrabold': 'font-weight: 800', 'font-black': 'font-weight: 900',
+    'uppercase': 'text-transform: uppercase', 'tracking-tighter': 'letter-spacing: -0.05em',
+    'antialiased': '-webkit-font-smoothing: antialiased; -moz-osx-font-smoothing: grayscale',
+    'transition': 'transition-property: color, background-color, border-color, text-decoration-color, fill, stroke, opacity, box-shadow, transform, filter, backdrop-filter; '
+                  'transition-timing-function: cubic-bezier(0.4, 0, 0.2, 1); transition-duration: 150ms',
+    'duration-300': 'transition-duration: 300ms', 'ease-in-out': 'transition-timing-function: cubic-bezier(0.4, 0, 0.2, 1)',
+}
+TAILWIND_SPACING_PROPERTIES = {
+    'mx': ('margin-left', 'margin-right'), 'mt': ('margin-top',), 'mb': ('margin-bottom',),
+    'p': ('padding',), 'px': ('padding-left', 'padding-right'), 'py': ('padding-top', 'padding-bottom'), 'pb': ('padding-bottom',),
+    'gap': ('gap',),
+}
+TAILWIND_PREFLIGHT = (
+    "*,::before,::after{box-sizing:border-box;border:0 solid #e5e7eb}"
+    "html{line-height:1.5;-webkit-text-size-adjust:100%;tab-size:4}"
+    "body{margin:0;line-height:inherit}"
+    "h1,h2,h3{font-size:inherit;font-weight:inherit}h1,h2,h3,p{margin:0}"
+    "table{text-indent:0;border-color:inherit;border-collapse:collapse}"
+    "button,select{font-family:inherit;font-size:100%;font-weight:inherit;line-height:inherit;color:inherit;margin:0;padding:0}"
+    "button{text-transform:none;background-color:transparent;background-image:none;cursor:pointer}"
+    "svg,canvas{display:block;vertical-align:middle}"
+)
+
+def get_utility_declarations(utility):
+    """Returns (order, CSS declarations) for a Tailwind utility class name without variant, or None if it is not covered."""
+    static_order = list(TAILWIND_STATIC)
+    if utility in TAILWIND_STATIC:
+        return static_order.index(utility), TAILWIND_STATIC[utility]
+    match = re.fullmatch(r'([a-z]+)-(\d+)', utility)
+    if match and match.group(1) in TAILWIND_SPACING_PROPERTIES and match.group(2) in TAILWIND_SPACING:
+        prefix, value = match.group(1), TAILWIND_SPACING[match.group(2)]
+        return 100 + list(TAILWIND_SPACING_PROPERTIES).index(prefix), '; '.join(f"{prop}: {value}" for prop in TAILWIND_SPACING_PROPERTIES[prefix])
+    match = re.fullmatch(r'grid-cols-(\d+)', utility)
+    if match:
+        return 200, f"grid-template-columns: repeat({match.group(1)}, minmax(0, 1fr))"
+    match = re.fullmatch(r'(max-h|max-w|min-h|h|w)-\[([\w.%]+)\]', utility)
+    if match:
+        prop = {'max-h': 'max-height', 'max-w': 'max-width', 'min-h': 'min-height', 'h': 'height', 'w': 'width'}[match.group(1)]
+        return 210, f"{prop}: {match.group(2)}"
+    match = re.fullmatch(r'(bg|border|text|from|to|ring)-([a-z]+(?:-\d+)?)(?:/(\d+))?', utility)
+    if match and match.group(2) in TAILWIND_COLORS:
+        kind, rgb, opacity = match.group(1), TAILWIND_COLORS[match.group(2)], match.group(3)
+        color = f"rgb({rgb} / {int(opacity) / 100})" if opacity else f"rgb({rgb})"
+        declarations = {
+            'bg': f"background-color: {color}", 'border': f"border-color: {color}", 'text': f"color: {color}",
+            'from': f"--tw-gradient-from: {color}; --tw-gradient-to: rgb({rgb} / 0); --tw-gradient-stops: var(--tw-gradient-from), var(--tw-gradient-to)",
+            'to': f"--tw-gradient-to: {color}", 'ring': f"--tw-ring-color: {color}",
+        }[kind]
+        return 300 + ['bg', 'from', 'to', 'border', 'text', 'ring'].index(kind), declarations
+    match = re.fullmatch(r'scale-(\d+)', utility)
+    if match:
+        return 400, f"transform: scale({int(match.group(1)) / 100})"
+    return None
+
+def build_utility_css(page):
+    """
+    Returns the preflight plus a rule for every covered Tailwind utility that appears in `page`
+    (plain, hover:/focus: and sm:/md:/lg:/xl: variants), in the order Tailwind would emit them.
+    """
+    base, states, screens = [], [], {screen: [] for screen in TAILWIND_SCREENS}
+    for token in set(re.findall(r'[\w:/\[\].%-]+', page)):
+        variant, _, utility = token.rpartition(':')
+        found = get_utility_declarations(utility)
+        if not found or not found[1] or variant not in ('', 'hover', 'focus', *TAILWIND_SCREENS):
+            continue
+        selector = '.' + re.sub(r'([:/\[\].%])', r'\\\1', token) + (f":{variant}" if variant in ('hover', 'focus') else '')
+        bucket = base if not variant else states if variant in ('hover', 'focus') else screens[variant]
+        bucket.append((found[0], token, f"{selector}{{{found[1]}}}"))
+
+    css = [TAILWIND_PREFLIGHT]
+    css.extend(rule for _, _, rule in sorted(base) + sorted(states))
+    for screen, min_width in TAILWIND_SCREENS.items():
+        rules = [rule for _, _, rule in sorted(screens[screen])]
+        if 'container' in {token for _, token, _ in base}:
+            rules.insert(0, f".container{{max-width: {min_width}px}}")
+        if rules:
+            css.append(f"@media (min-width: {min_width}px){{{''.join(rules)}}}")
+    return ''.join(css)
+
+def get_vendor_script(name):
+    """
+    Returns a vendored script from VENDOR_DIR. A missing one is downloaded once from its pinned
+    URL in VENDOR_SCRIPTS (commit vendor/ to build the bundle on a machine without internet access).
+    """
+    path = os.path.join(VENDOR_DIR, name)
+    if not os.path.exists(path):
+        print(f"Downloading vendored script {name} from {VENDOR_SCRIPTS[name]}...")
+        try:
+            response = requests.get(VENDOR_SCRIPTS[name], timeout=FETCH_TIMEOUT)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise IOError(f"Vendored script '{name}' is missing from {VENDOR_DIR} and could not be downloaded ({e}). "
+                          f"Copy it there from {VENDOR_SCRIPTS[name]}.")
+        os.makedirs(VENDOR_DIR, exist_ok=True)
+        write_if_changed(path, response.content)
+    with open(path, 'rb') as f:
+        return f.read()
+
+def write_vendor_scripts(output_dir):
+    """Copies the vendored scripts to `<output_dir>/vendor/`, leaving unchanged copies alone. Returns the paths that changed."""
+    os.makedirs(os.path.join(output_dir, 'vendor'), exist_ok=True)
+    written = []
+    for name in VENDOR_SCRIPTS:
+        path = os.path.join(output_dir, 'vendor', name)
+        if write_if_changed(path, get_vendor_script(name)):
+            written.append(path)
+    return written
+
+def minify_inline_script(script):
+    """Drops indentation, blank lines and whole-line comments from the page's own script."""
+    lines = (line.strip() for line in script.split('\n'))
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+def generate_html(payload=None, manifest_url=None, game=DEFAULT_GAME, offline=False):
+    """
+    Generates the full HTML content for a game's dashboard from a payload built by build_dashboard_payload.
+    With `manifest_url` the page is a static shell that loads its data at runtime, so it only changes
+    when the markup or scripts change. With `offline` the page makes no CDN requests: the CSS it uses
+    is inlined, its script is minified, Chart.js is loaded from vendor/ (see write_vendor_scripts) and
+    system fonts replace Inter.
+    """
+    data_loader_js = get_data_loader_js(payload, manifest_url)
+    title = GAMES[game].title
+    if offline:
+        head_assets = """<script src="vendor/chart.umd.js"></script><script src="vendor/chartjs-adapter-date-fns.bundle.min.js"></script>"""
+    else:
+        head_assets = """<script src="https://cdn.tailwindcss.com"></script><script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
+    <script src="https://cdn.jsdelivr.net/npm/chartjs-adapter-date-fns/dist/chartjs-adapter-date-fns.bundle.min.js"></script>
+    <link rel="preconnect" href="https://fonts.googleapis.com"><link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700;800;900&display=swap" rel="stylesheet">"""
+
+    page = f"""
 <!DOCTYPE html>
 <html lang="en">
 <head>
-    <meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"><title>TimeGuessr Dashboard</title>
-    <script src="https://cdn.tailwindcss.com"></script><script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/chartjs-adapter-date-fns/dist/chartjs-adapter-date-fns.bundle.min.js"></script>
-    <link rel="preconnect" href="https://fonts.googleapis.com"><link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700;800;900&display=swap" rel="stylesheet">
+    <meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"><title>{title} Dashboard</title>
+    {head_assets}
     <style>
-        body {{ font-family: 'Inter', sans-serif; background-color: #0F172A; background-image: radial-gradient(circle at top right, #1E293B, #0F172A); }}
+        body {{ font-family: 'Inter', ui-sans-serif, system-ui, -apple-system, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; background-color: #0F172A; background-image: radial-gradient(circle at top right, #1E293B, #0F172A); }}
         .card {{ background-color: rgba(30, 41, 59, 0.5); backdrop-filter: blur(10px); border: 1px solid #334155; border-radius: 0.75rem; padding: 1.5rem; box-shadow: 0 10px 15px -3px rgb(0 0 0 / 0.1), 0 4px 6px -4px rgb(0 0 0 / 0.1); transition: all 0.3s ease-in-out; }}
         .card:hover {{ transform: translateY(-5px); box-shadow: 0 20px 25px -5px rgb(0 0 0 / 0.1), 0 8px 10px -6px rgb(0 0 0 / 0.1); border-color: #475569; }}
         .stat-value {{ font-size: 1.875rem; font-weight: 800; color: #ffffff; }}
@@ -297,10 +1965,11 @@ def generate_html(player_data):
 <body class="text-slate-300 antialiased">
     <div class="container mx-auto p-4 sm:p-6 lg:p-8">
         <header class="text-center mb-12">
-            <h1 class="text-4xl md:text-6xl font-black text-white tracking-tighter">TimeGuessr<span class="gradient-text">Dashboard</span></h1>
+            <h1 class="text-4xl md:text-6xl font-black text-white tracking-tighter">{title}<span class="gradient-text">Dashboard</span></h1>
             <p class="mt-4 text-lg text-slate-400 max-w-2xl mx-auto">An interactive overview of player performance and head-to-head stats.</p>
         </header>
         <section id="today-leaderboard-section" class="card mb-12 hidden"></section>
+        <section id="period-bests-section" class="card mb-12 hidden"></section>
         <section id="comparison-section" class="card mb-12">
             <h2 class="text-2xl font-bold text-white mb-6 border-b border-slate-700 pb-4 flex items-center gap-3">
                 <svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round" class="text-blue-400"><path d="M17 21v-2a4 4 0 0 0-4-4H5a4 4 0 0 0-4 4v2"></path><circle cx="9" cy="7" r="4"></circle><path d="M23 21v-2a4 4 0 0 0-3-3.87"></path><path d="M16 3.13a4 4 0 0 1 0 7.75"></path></svg>
@@ -316,7 +1985,7 @@ def generate_html(player_data):
                 <div class="mb-8"><h3 class="text-xl font-bold text-white mb-4">Score Over Time (Common Dates)</h3><div class="bg-slate-800/50 p-4 rounded-lg"><canvas id="scoreChart"></canvas></div></div>
                 <div>
                     <h3 class="text-xl font-bold text-white mb-4">Head-to-Head Game Log</h3>
-                    <div class="overflow-x-auto"><table class="min-w-full text-sm text-left text-slate-300"><thead class="text-xs text-slate-400 uppercase bg-slate-700/50"><tr><th scope="col" class="px-6 py-3">Date</th><th id="p1-table-header" scope="col" class="px-6 py-3">Player 1 Score</th><th id="p2-table-header" scope="col" class="px-6 py-3">Player 2 Score</th><th scope="col" class="px-6 py-3">Winner</th></tr></thead><tbody id="comparison-table-body"></tbody></table></div>
+                    <div id="game-log-scroll" class="overflow-auto max-h-[32rem]"><table class="min-w-full text-sm text-left text-slate-300"><thead class="sticky top-0 text-xs text-slate-400 uppercase bg-slate-800"><tr><th scope="col" class="px-6 py-3">Date</th><th id="p1-table-header" scope="col" class="px-6 py-3">Player 1 Score</th><th id="p2-table-header" scope="col" class="px-6 py-3">Player 2 Score</th><th scope="col" class="px-6 py-3">Winner</th></tr></thead><tbody id="comparison-table-body"></tbody></table></div>
                 </div>
             </div><div id="no-common-games-msg" class="mt-8 text-center text-yellow-400 hidden"><p>These players have no games played on the same day.</p></div>
         </section>
@@ -327,20 +1996,21 @@ def generate_html(player_data):
             </h2><div id="leaderboard" class="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-6"></div>
         </section>
     </div>
-    <script>
-        const playerData = {player_data_json};
-        document.addEventListener('DOMContentLoaded', () => {{
+    <script>{PLAYER_DATA_DECODER_JS}
+        function initDashboard(dashboardData) {{
+            const {{ playerData, headToHead, dailyLeaderboards, rolling, periodBests }} = dashboardData;
             const p1Select = document.getElementById('player1'), p2Select = document.getElementById('player2'), compareBtn = document.getElementById('compare-btn');
             const leaderboard = document.getElementById('leaderboard'), results = document.getElementById('comparison-results'), noGamesMsg = document.getElementById('no-common-games-msg');
-            const todayLeaderboardSection = document.getElementById('today-leaderboard-section');
-            let scoreChart = null;
+            const todayLeaderboardSection = document.getElementById('today-leaderboard-section'), periodBestsSection = document.getElementById('period-bests-section');
+            const todayMs = Date.parse(new Date().toISOString().slice(0, 10) + 'T00:00:00Z'), yesterday = new Date(todayMs - 86400000).toISOString().slice(0, 10);
+            const trendWindow = rolling.windows.includes(30) ? 30 : rolling.windows[0];
+            const chartMaxPoints = {CHART_MAX_POINTS}, gameLogRowBuffer = {GAME_LOG_ROW_BUFFER};
+            let scoreChart = null, pendingChart = null, gameLog = null;
 
             function displayTodayLeaderboard() {{
                 const today = new Date().toISOString().slice(0, 10);
-                const todayScores = [];
-                Object.entries(playerData).forEach(([pid, data]) => {{ if (data.scores_by_date[today]) {{ todayScores.push({{ name: data.name, score: data.scores_by_date[today] }}); }} }});
+                const todayScores = (dailyLeaderboards[today] || []).filter(([pid, score]) => score).map(([pid, score]) => ({{ name: playerData[pid].name, score }}));
                 if (todayScores.length > 0) {{
-                    todayScores.sort((a, b) => b.score - a.score);
                     let tableHtml = `
                         <h2 class="text-2xl font-bold text-white mb-6 flex items-center gap-3">
                             <svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round" class="text-amber-400"><path d="M12 2l3.09 6.26L22 9.27l-5 4.87L18.18 22 12 18.77 5.82 22 7 14.14 2 9.27l6.91-1.01L12 2z"></path></svg>
@@ -356,16 +2026,53 @@ def generate_html(player_data):
                     todayLeaderboardSection.classList.remove('hidden');
                 }}
             }}
+            function displayPeriodBests() {{
+                const periodLabels = {{ week: 'Weekly Bests', month: 'Monthly Bests' }};
+                const tables = Object.entries(periodBests).filter(([, byStart]) => Object.keys(byStart).length > 0).map(([period, byStart]) => {{
+                    const rows = Object.entries(byStart).reverse().map(([start, entries]) => {{
+                        const [pid, best, games, average] = entries[0], label = period === 'month' ? start.slice(0, 7) : `Week of ${{start}}`;
+                        return `<tr class="border-b border-slate-700 hover:bg-slate-700/50 transition"><td class="px-4 py-3 font-medium text-white whitespace-nowrap">${{label}}</td>
+                            <td class="px-4 py-3 text-white">${{playerData[pid] ? playerData[pid].name : pid}}</td><td class="px-4 py-3 font-bold text-green-400">${{best.toLocaleString()}}</td>
+                            <td class="px-4 py-3">${{average.toLocaleString()}} <span class="text-slate-500">(${{games}})</span></td></tr>`;
+                    }}).join('');
+                    return `<div><h3 class="text-xl font-bold text-white mb-4">${{periodLabels[period] || period}}</h3><div class="overflow-x-auto"><table class="min-w-full text-sm text-left text-slate-300"><thead class="text-xs text-slate-400 uppercase bg-slate-700/50"><tr>
+                        <th scope="col" class="px-4 py-3">Period</th><th scope="col" class="px-4 py-3">Best Player</th><th scope="col" class="px-4 py-3">Best Score</th><th scope="col" class="px-4 py-3">Their Avg (Games)</th></tr></thead><tbody>${{rows}}</tbody></table></div></div>`;
+                }});
+                if (tables.length === 0) return;
+                periodBestsSection.innerHTML = `<div class="grid grid-cols-1 lg:grid-cols-2 gap-8">${{tables.join('')}}</div>`;
+                periodBestsSection.classList.remove('hidden');
+            }}
+            function getRollingByDate(pid, windowDays) {{
+                const series = rolling.series[pid], w = rolling.windows.indexOf(windowDays), byDate = {{}};
+                if (series && w >= 0) Object.keys(playerData[pid].scores_by_date).sort().forEach((d, i) => {{ byDate[d] = series[w][i]; }});
+                return byDate;
+            }}
             function populateSelectors() {{
                 const playerIds = Object.keys(playerData).sort((a,b) => playerData[a].name.localeCompare(playerData[b].name));
                 playerIds.forEach(pid => {{ [p1Select, p2Select].forEach(sel => {{ const opt = document.createElement('option'); opt.value = pid; opt.textContent = playerData[pid].name; sel.appendChild(opt); }}); }});
             }}
+            // Runs render() once `element` is about to scroll into view (at once without IntersectionObserver).
+            // Returns a function that cancels a render that has not happened yet.
+            function whenVisible(element, render) {{
+                if (!('IntersectionObserver' in window)) {{ render(); return () => {{}}; }}
+                const observer = new IntersectionObserver(entries => {{
+                    if (entries.some(entry => entry.isIntersecting)) {{ observer.disconnect(); render(); }}
+                }}, {{ rootMargin: '300px' }});
+                observer.observe(element);
+                return () => observer.disconnect();
+            }}
             function displayLeaderboard() {{
                 const sorted = Object.entries(playerData).sort(([, a], [, b]) => b.average_score - a.average_score);
                 leaderboard.innerHTML = '';
                 sorted.forEach(([pid, stats], i) => {{
-                    const card = document.createElement('div'); card.className = 'card flex flex-col justify-between';
-                    card.innerHTML = `<div><div class="flex justify-between items-center mb-4"><h3 class="text-xl font-bold text-white">${{stats.name}}</h3><span class="text-sm font-bold bg-slate-700 text-slate-300 px-2 py-1 rounded">#${{i + 1}}</span></div>
+                    // Cards start as empty placeholders of about the same height and are filled when they come into view.
+                    const card = document.createElement('div'); card.className = 'card flex flex-col justify-between'; card.style.minHeight = '28rem';
+                    leaderboard.appendChild(card);
+                    whenVisible(card, () => {{ card.innerHTML = createLeaderboardCardHTML(stats, i); card.style.minHeight = ''; }});
+                }});
+            }}
+            function createLeaderboardCardHTML(stats, i) {{
+                return `<div><div class="flex justify-between items-center mb-4"><h3 class="text-xl font-bold text-white">${{stats.name}}</h3><span class="text-sm font-bold bg-slate-700 text-slate-300 px-2 py-1 rounded">#${{i + 1}}</span></div>
                         <div class="grid grid-cols-2 gap-4 text-center">
                             <div class="bg-slate-800/50 p-3 rounded-lg"><p class="stat-value text-green-400">${{stats.average_score.toLocaleString()}}</p><p class="stat-label">Avg Score</p></div>
                             <div class="bg-slate-800/50 p-3 rounded-lg"><p class="stat-value">${{stats.total_games}}</p><p class="stat-label">Games Played</p></div>
@@ -374,178 +2081,545 @@ def generate_html(player_data):
                         </div><div class="grid grid-cols-2 gap-4 text-center mt-4">
                             <div class="bg-slate-800/50 p-3 rounded-lg"><p class="stat-value text-cyan-400">${{stats.avg_location_score.toFixed(2)}}</p><p class="stat-label">Avg 🌎 Score</p></div>
                             <div class="bg-slate-800/50 p-3 rounded-lg"><p class="stat-value text-fuchsia-400">${{stats.avg_date_score.toFixed(2)}}</p><p class="stat-label">Avg 📅 Score</p></div>
-                        </div></div>`;
-                    leaderboard.appendChild(card);
-                }});
+                        </div>${{createRecentFormHTML(stats)}}</div>`;
+            }}
+            function createRecentFormHTML(stats) {{
+                if (rolling.windows.length === 0) return '';
+                const averages = rolling.windows.map(w => {{ const avg = stats[`avg_${{w}}_days`];
+                    return `<div class="bg-slate-800/50 p-3 rounded-lg"><p class="text-xl font-extrabold text-amber-300">${{avg == null ? '–' : avg.toLocaleString()}}</p><p class="stat-label">Last ${{w}} Days</p></div>`; }}).join('');
+                const current = stats.streak_last_date >= yesterday ? stats.current_streak : 0;
+                return `<div class="grid grid-cols-3 gap-4 text-center mt-4">${{averages}}</div>
+                    <p class="mt-4 text-sm text-center text-slate-400">🔥 Streak: <span class="font-bold text-white">${{current || 0}}</span> day(s) · Longest: <span class="font-bold text-white">${{stats.longest_streak || 0}}</span></p>`;
             }}
             function handleCompare() {{
                 const p1Id = p1Select.value, p2Id = p2Select.value;
                 if (!p1Id || !p2Id || p1Id === p2Id) return alert("Please select two different players.");
+                const pair = getHeadToHead(p1Id, p2Id);
+                results.classList.add('hidden'); noGamesMsg.classList.add('hidden');
+                if (pair.common === 0) return noGamesMsg.classList.remove('hidden');
+                updateStatCards(p1Id, p2Id, pair);
+                results.classList.remove('hidden');
+                // The chart and game log still need the individual common dates.
                 const p1Scores = playerData[p1Id].scores_by_date, p2Scores = playerData[p2Id].scores_by_date;
                 const commonDates = Object.keys(p1Scores).filter(date => date in p2Scores).sort();
-                results.classList.add('hidden'); noGamesMsg.classList.add('hidden');
-                if (commonDates.length === 0) return noGamesMsg.classList.remove('hidden');
                 const p1Common = commonDates.map(d => p1Scores[d]), p2Common = commonDates.map(d => p2Scores[d]);
-                updateStatCards(p1Id, p1Common, p2Id, p2Common);
-                updateChart(commonDates, p1Id, p1Common, p2Id, p2Common);
+                const p1Trend = getRollingByDate(p1Id, trendWindow), p2Trend = getRollingByDate(p2Id, trendWindow);
+                if (pendingChart) pendingChart();
+                pendingChart = whenVisible(document.getElementById('scoreChart'), () => {{
+                    pendingChart = null;
+                    updateChart(commonDates, p1Id, p1Common, p2Id, p2Common, commonDates.map(d => p1Trend[d]), commonDates.map(d => p2Trend[d]));
+                }});
                 updateTable(commonDates, p1Id, p1Common, p2Id, p2Common);
-                results.classList.remove('hidden');
             }}
-            function createStatCardHTML(playerName, scores, wins) {{
-                if (scores.length === 0) return '';
-                const avg = Math.round(scores.reduce((a, b) => a + b, 0) / scores.length); const high = Math.max(...scores);
+            function getHeadToHead(p1Id, p2Id) {{
+                const swapped = Number(p1Id) > Number(p2Id);
+                const row = headToHead[swapped ? `${{p2Id}}|${{p1Id}}` : `${{p1Id}}|${{p2Id}}`] || [0, 0, 0, 0, 0, 0, 0, 0];
+                const [common, lowWins, highWins, ties, lowSum, highSum, lowHigh, highHigh] = row;
+                const low = {{ wins: lowWins, sum: lowSum, high: lowHigh }}, high = {{ wins: highWins, sum: highSum, high: highHigh }};
+                return {{ common, ties, p1: swapped ? high : low, p2: swapped ? low : high }};
+            }}
+            function createStatCardHTML(playerName, common, stats) {{
+                if (common === 0) return '';
+                const wins = stats.wins, avg = Math.round(stats.sum / common), high = stats.high;
                 return `<h3 class="text-2xl font-bold text-white mb-4">${{playerName}}</h3><div class="grid grid-cols-3 gap-4 text-center"><div class="bg-slate-800/50 p-3 rounded-lg"><p class="stat-value text-green-400">${{wins}}</p><p class="stat-label">Wins</p></div><div class="bg-slate-800/50 p-3 rounded-lg"><p class="stat-value">${{avg.toLocaleString()}}</p><p class="stat-label">Avg Score</p></div><div class="bg-slate-800/50 p-3 rounded-lg"><p class="stat-value text-blue-400">${{high.toLocaleString()}}</p><p class="stat-label">High Score</p></div></div>`;
             }}
-            function updateStatCards(p1Id, p1Scores, p2Id, p2Scores) {{
-                let p1Wins = p1Scores.filter((s, i) => s > p2Scores[i]).length, p2Wins = p2Scores.filter((s, i) => s > p1Scores[i]).length;
-                document.getElementById('p1-stats').innerHTML = createStatCardHTML(playerData[p1Id].name, p1Scores, p1Wins);
-                document.getElementById('p2-stats').innerHTML = createStatCardHTML(playerData[p2Id].name, p2Scores, p2Wins);
+            function updateStatCards(p1Id, p2Id, pair) {{
+                document.getElementById('p1-stats').innerHTML = createStatCardHTML(playerData[p1Id].name, pair.common, pair.p1);
+                document.getElementById('p2-stats').innerHTML = createStatCardHTML(playerData[p2Id].name, pair.common, pair.p2);
+            }}
+            // Largest-Triangle-Three-Buckets: keeps the first and last points and, from each of `threshold` - 2
+            // buckets in between, the point forming the largest triangle with the previous pick and the next bucket's mean.
+            function downsampleLTTB(points, threshold) {{
+                if (points.length <= threshold || threshold < 3) return points;
+                const sampled = [points[0]], bucketSize = (points.length - 2) / (threshold - 2);
+                let previous = 0;
+                for (let i = 0; i < threshold - 2; i++) {{
+                    const nextStart = Math.floor((i + 1) * bucketSize) + 1, nextEnd = Math.min(Math.floor((i + 2) * bucketSize) + 1, points.length);
+                    let meanX = 0, meanY = 0;
+                    for (let j = nextStart; j < nextEnd; j++) {{ meanX += points[j].x; meanY += points[j].y; }}
+                    meanX /= nextEnd - nextStart; meanY /= nextEnd - nextStart;
+                    const a = points[previous];
+                    let maxArea = -1, picked = nextStart - 1;
+                    for (let j = Math.floor(i * bucketSize) + 1; j < nextStart; j++) {{
+                        const area = Math.abs((a.x - meanX) * (points[j].y - a.y) - (a.x - points[j].x) * (meanY - a.y));
+                        if (area > maxArea) {{ maxArea = area; picked = j; }}
+                    }}
+                    sampled.push(points[picked]); previous = picked;
+                }}
+                sampled.push(points[points.length - 1]);
+                return sampled;
             }}
-            function updateChart(labels, p1Id, p1Data, p2Id, p2Data) {{
+            function toChartPoints(dates, values) {{
+                const points = [];
+                dates.forEach((d, i) => {{ if (values[i] != null) points.push({{ x: Date.parse(d + 'T00:00:00Z'), y: values[i] }}); }});
+                return downsampleLTTB(points, chartMaxPoints);
+            }}
+            function updateChart(dates, p1Id, p1Scores, p2Id, p2Scores, p1Trend, p2Trend) {{
                 const ctx = document.getElementById('scoreChart').getContext('2d');
                 if (scoreChart) scoreChart.destroy();
-                scoreChart = new Chart(ctx, {{ type: 'line', data: {{ labels, datasets: [
+                const p1Data = toChartPoints(dates, p1Scores), p2Data = toChartPoints(dates, p2Scores);
+                p1Trend = toChartPoints(dates, p1Trend); p2Trend = toChartPoints(dates, p2Trend);
+                scoreChart = new Chart(ctx, {{ type: 'line', data: {{ datasets: [
                     {{ label: playerData[p1Id].name, data: p1Data, borderColor: '#38BDF8', backgroundColor: 'rgba(56, 189, 248, 0.2)', borderWidth: 2, tension: 0.4, fill: true, pointBackgroundColor: '#38BDF8' }},
-                    {{ label: playerData[p2Id].name, data: p2Data, borderColor: '#A78BFA', backgroundColor: 'rgba(167, 139, 250, 0.2)', borderWidth: 2, tension: 0.4, fill: true, pointBackgroundColor: '#A78BFA' }}
+                    {{ label: playerData[p2Id].name, data: p2Data, borderColor: '#A78BFA', backgroundColor: 'rgba(167, 139, 250, 0.2)', borderWidth: 2, tension: 0.4, fill: true, pointBackgroundColor: '#A78BFA' }},
+                    ...(trendWindow ? [
+                        {{ label: `${{playerData[p1Id].name}} (${{trendWindow}}-day avg)`, data: p1Trend, borderColor: '#38BDF8', borderDash: [6, 4], borderWidth: 1.5, pointRadius: 0, fill: false, tension: 0.4 }},
+                        {{ label: `${{playerData[p2Id].name}} (${{trendWindow}}-day avg)`, data: p2Trend, borderColor: '#A78BFA', borderDash: [6, 4], borderWidth: 1.5, pointRadius: 0, fill: false, tension: 0.4 }}
+                    ] : [])
                 ]}}, options: {{ responsive: true, maintainAspectRatio: false, scales: {{ y: {{ beginAtZero: false, ticks: {{ color: '#94A3B8' }}, grid: {{ color: '#334155' }} }}, x: {{ type: 'time', time: {{ unit: 'day' }}, ticks: {{ color: '#94A3B8' }}, grid: {{ color: '#334155' }} }} }}, plugins: {{ legend: {{ labels: {{ color: '#CBD5E1' }} }} }} }} }});
             }}
+            // A table body that only holds the rows in (and near) the visible part of its scroll container,
+            // between two spacer rows that keep the scroll height of the full table.
+            function createVirtualTable(container, tableBody) {{
+                let rowCount = 0, rowHeight = 0, frame = null, renderRow = null;
+                function render() {{
+                    frame = null;
+                    if (!rowHeight && rowCount > 0) {{
+                        tableBody.innerHTML = renderRow(0);
+                        rowHeight = (tableBody.firstElementChild && tableBody.firstElementChild.getBoundingClientRect().height) || 53;
+                    }}
+                    const viewHeight = container.clientHeight || 512;
+                    const first = Math.max(0, Math.floor(container.scrollTop / (rowHeight || 1)) - gameLogRowBuffer);
+                    const last = Math.min(rowCount, Math.ceil((container.scrollTop + viewHeight) / (rowHeight || 1)) + gameLogRowBuffer);
+                    let html = first > 0 ? `<tr style="height: ${{first * rowHeight}}px"></tr>` : '';
+                    for (let i = first; i < last; i++) html += renderRow(i);
+                    if (last < rowCount) html += `<tr style="height: ${{(rowCount - last) * rowHeight}}px"></tr>`;
+                    tableBody.innerHTML = html;
+                }}
+                container.addEventListener('scroll', () => {{ if (!frame) frame = requestAnimationFrame(render); }});
+                return {{
+                    setRows(count, rowRenderer) {{ rowCount = count; renderRow = rowRenderer; container.scrollTop = 0; render(); }}
+                }};
+            }}
             function updateTable(dates, p1Id, p1Scores, p2Id, p2Scores) {{
-                const tableBody = document.getElementById('comparison-table-body'); tableBody.innerHTML = '';
+                const tableBody = document.getElementById('comparison-table-body');
                 document.getElementById('p1-table-header').textContent = `${{playerData[p1Id].name}} Score`;
                 document.getElementById('p2-table-header').textContent = `${{playerData[p2Id].name}} Score`;
-                dates.forEach((date, i) => {{
+                if (!gameLog) gameLog = createVirtualTable(document.getElementById('game-log-scroll'), tableBody);
+                gameLog.setRows(dates.length, i => {{
                     const p1s = p1Scores[i], p2s = p2Scores[i];
                     let winner, wClass;
                     if (p1s > p2s) {{ winner = playerData[p1Id].name; wClass = 'text-blue-400'; }}
                     else if (p2s > p1s) {{ winner = playerData[p2Id].name; wClass = 'text-purple-400'; }}
                     else {{ winner = 'Tie'; wClass = 'text-slate-400'; }}
-                    const row = document.createElement('tr'); row.className = 'border-b border-slate-700 hover:bg-slate-700/50 transition';
-                    row.innerHTML = `<td class="px-6 py-4 font-medium text-white whitespace-nowrap">${{date}}</td><td class="px-6 py-4">${{p1s.toLocaleString()}}</td><td class="px-6 py-4">${{p2s.toLocaleString()}}</td><td class="px-6 py-4 font-bold ${{wClass}}">${{winner}}</td>`;
-                    tableBody.appendChild(row);
+                    return `<tr class="border-b border-slate-700 hover:bg-slate-700/50 transition"><td class="px-6 py-4 font-medium text-white whitespace-nowrap">${{dates[i]}}</td><td class="px-6 py-4">${{p1s.toLocaleString()}}</td><td class="px-6 py-4">${{p2s.toLocaleString()}}</td><td class="px-6 py-4 font-bold ${{wClass}}">${{winner}}</td></tr>`;
                 }});
             }}
-            displayTodayLeaderboard(); populateSelectors(); displayLeaderboard(); compareBtn.addEventListener('click', handleCompare);
-        }});
+            displayTodayLeaderboard(); displayPeriodBests(); populateSelectors(); displayLeaderboard(); compareBtn.addEventListener('click', handleCompare);
+        }}
+        {data_loader_js}
     </script>
 </body>
 </html>
 """
+    if offline:
+        # After the page's own styles, as the Tailwind CDN would inject it, so utilities override them.
+        page = page.replace("</head>", f"<style>{build_utility_css(page.replace(data_loader_js, ''))}</style>\n</head>", 1)
+        page = re.sub(r'<script>(.*?)</script>', lambda m: f"<script>{minify_inline_script(m.group(1))}</script>", page, flags=re.S)
+    return page
+
+def get_split_output_names(out_path):
+    """Returns (manifest filename, glob pattern of data filenames) for a split dashboard written to `out_path`."""
+    stem = os.path.splitext(os.path.basename(out_path))[0]
+    return f"{stem}.data.json", f"{stem}.data-*.json"
+
+def get_precompressed_variants(data_bytes):
+    """
+    Returns {extension: compressed bytes} for servers that can serve pre-compressed files
+    (e.g. nginx gzip_static/brotli_static). Brotli is only produced if the optional `brotli` package is installed.
+    """
+    variants = {".gz": gzip.compress(data_bytes, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+        variants[".br"] = brotli.compress(data_bytes, quality=11)
+    except ImportError:
+        pass
+    return variants
+
+def write_if_changed(path, content):
+    """
+    Writes `content` (str or bytes) to `path` unless the file already holds exactly that content,
+    so unchanged outputs keep their timestamp and never show up as a git change.
+    The file is replaced atomically. Returns True if it was written.
+    """
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        with open(path, 'rb') as f:
+            if hashlib.sha256(f.read()).digest() == hashlib.sha256(data).digest():
+                return False
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+def write_split_dashboard(out_path, payload, precompress=False, game=DEFAULT_GAME, offline=False):
+    """
+    Writes the dashboard as three files next to `out_path`:
+      - the HTML shell, which does not depend on the data and is only rewritten when the template changes,
+      - `<stem>.data-<hash>.json`, the minified payload named after its content hash (safe to cache forever),
+        plus `.gz`/`.br` copies of it when `precompress` is set,
+      - `<stem>.data.json`, a tiny manifest pointing the shell at the current data file.
+    Data files from previous runs are removed. Returns the paths that were (re)written.
+    """
+    output_dir = os.path.dirname(os.path.abspath(out_path))
+    manifest_name, data_pattern = get_split_output_names(out_path)
+    data_bytes = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    data_name = data_pattern.replace('*', hashlib.sha256(data_bytes).hexdigest()[:12])
+
+    written = []
+    data_files = {data_name: data_bytes}
+    if precompress:
+        data_files.update({data_name + ext: blob for ext, blob in get_precompressed_variants(data_bytes).items()})
+    for name, blob in data_files.items():
+        data_path = os.path.join(output_dir, name)
+        if not os.path.exists(data_path):
+            write_if_changed(data_path, blob)
+            written.append(data_path)
+
+    for path, content in ((os.path.join(output_dir, manifest_name), json.dumps({"data": data_name})),
+                          (out_path, generate_html(manifest_url=manifest_name, game=game, offline=offline))):
+        if write_if_changed(path, content):
+            written.append(path)
+
+    for stale_path in glob.glob(os.path.join(output_dir, data_pattern + '*')):
+        if os.path.basename(stale_path) not in data_files:
+            os.remove(stale_path)
+            written.append(stale_path)
+    return written
 
 # ==============================================================================
 # SECTION 4: GIT INTEGRATION
 # ==============================================================================
 
-def run_git_command(command, cwd):
+def run_git_command(command, cwd, timeout=None):
     """Runs a Git command in a specified directory and checks for errors."""
     try:
         # Using capture_output=True to hide the command's output unless there's an error.
-        result = subprocess.run(command, cwd=cwd, check=True, capture_output=True, text=True)
+        result = subprocess.run(command, cwd=cwd, check=True, capture_output=True, text=True, timeout=timeout)
         return True
     except subprocess.CalledProcessError as e:
         print(f"Error running command: {' '.join(command)}")
         print(f"Return code: {e.returncode}")
         print(f"Stderr:\n{e.stderr}")
         return False
+    except subprocess.TimeoutExpired:
+        print(f"Error running command: {' '.join(command)} (timed out after {timeout}s)")
+        return False
     except FileNotFoundError:
         print("Error: 'git' command not found. Is Git installed and in your PATH?")
         return False
 
-def commit_and_push_updates(repo_path):
-    """Adds, commits, and pushes changes in the specified Git repository."""
+def commit_and_push_updates(repo_path, paths, push_timeout=GIT_PUSH_TIMEOUT, push_retries=GIT_PUSH_RETRIES):
+    """
+    Adds, commits, and pushes the output files `paths` in the specified Git repository. Only these are staged,
+    never the rest of the folder (such as the post stores and score state when run from the checkout).
+    Only called once files were actually rewritten, so there is no separate `git status` check: the commit is
+    skipped when nothing ends up staged, but the push still runs to deliver commits left by an earlier failed push.
+    Returns True if the push succeeded.
+    """
     print(f"\nAttempting to commit and push updates for repository: {repo_path}")
-    
-    # Check for changes first to avoid errors on commit.
-    try:
-        status_check = subprocess.run(["git", "status", "--porcelain"], cwd=repo_path, check=True, capture_output=True, text=True)
-        if not status_check.stdout.strip():
-            print("No changes to commit. Skipping git operations.")
-            return
-    except (subprocess.CalledProcessError, FileNotFoundError):
-         print("Could not check git status. Skipping git operations.")
-         return
+    with METRICS.stage("git"):
+        return _commit_and_push(repo_path, sorted(paths), push_timeout, push_retries)
 
-    print("Changes detected. Proceeding with git commands...")
+def _commit_and_push(repo_path, paths, push_timeout, push_retries):
+    # 1. git add the written files; the removed ones (stale data files) are staged as deletions
+    present = [path for path in paths if os.path.exists(path)]
+    removed = [path for path in paths if not os.path.exists(path)]
+    if present and not run_git_command(["git", "add", "--", *present], cwd=repo_path):
+        return False
+    if removed and not run_git_command(["git", "rm", "--cached", "--quiet", "--ignore-unmatch", "--", *removed], cwd=repo_path):
+        return False
 
-    # 1. git add *
-    if not run_git_command(["git", "add", "*"], cwd=repo_path):
-        return
+    # 2. git commit -m "<unixdatetime stamp>", limited to those files: anything else already staged stays out.
+    # The pathspec lists only the staged ones, since a removed file git never tracked would not match.
+    staged = []
+    if paths:
+        diff = subprocess.run(["git", "diff", "--cached", "--name-only", "-z", "--", *paths], cwd=repo_path, capture_output=True, text=True)
+        staged = [f":(top){name}" for name in diff.stdout.split("\0") if name]
+    if staged:
+        commit_message = f"auto-update: {int(time.time())}"
+        if not run_git_command(["git", "commit", "-m", commit_message, "--", *staged], cwd=repo_path):
+            return False
+    else:
+        print("No changes to commit.")
 
-    # 2. git commit -m "<unixdatetime stamp>"
-    commit_message = f"auto-update: {int(time.time())}"
-    if not run_git_command(["git", "commit", "-m", commit_message], cwd=repo_path):
-        return
-    
-    # 3. git push
+    # 3. git push, retried with a growing delay
     print("Pushing changes to remote repository...")
-    if not run_git_command(["git", "push"], cwd=repo_path):
-        return
+    for attempt in range(1, push_retries + 1):
+        METRICS.count("git_push_attempts_total")
+        if run_git_command(["git", "push"], cwd=repo_path, timeout=push_timeout):
+            print(f"✅ Successfully committed and pushed updates to {repo_path}")
+            return True
+        if attempt < push_retries:
+            delay = GIT_PUSH_RETRY_DELAY * 2 ** (attempt - 1)
+            print(f"Push attempt {attempt}/{push_retries} failed. Retrying in {delay}s...")
+            time.sleep(delay)
+    print(f"Push failed after {push_retries} attempt(s). It will be retried with the next publish.")
+    return False
+
+class PublishQueue:
+    """
+    Coalesces dashboard updates into one commit and push per repository.
+    `submit()` marks files of a repository as changed; `publish_due()` publishes the repositories whose first
+    unpublished change is at least `window` seconds old, and `flush()` publishes everything pending now.
+    A repository whose push failed stays queued and is retried on the next publish.
+    """
 
-    print(f"✅ Successfully committed and pushed updates to {repo_path}")
+    def __init__(self, window=0, push_timeout=GIT_PUSH_TIMEOUT):
+        self.window = window
+        self.push_timeout = push_timeout
+        self._pending = {}  # repo path -> time.monotonic() of its first unpublished change
+        self._paths = defaultdict(set)  # repo path -> files changed since its last successful publish
+
+    def submit(self, repo_path, paths):
+        """Queues the changed files `paths` of a repository for publishing."""
+        self._pending.setdefault(repo_path, time.monotonic())
+        self._paths[repo_path].update(paths)
+        if self.window > 0:
+            print(f"Queued the update for publishing (within {self.window:g}s).")
+
+    def seconds_until_due(self):
+        """Returns how long until the next queued publish is due, or None if nothing is queued."""
+        if not self._pending:
+            return None
+        return max(0.0, min(self._pending.values()) + self.window - time.monotonic())
+
+    def publish_due(self):
+        """Publishes every repository whose coalescing window has elapsed."""
+        now = time.monotonic()
+        for repo_path, since in list(self._pending.items()):
+            if now - since >= self.window:
+                self._publish(repo_path)
+
+    def flush(self):
+        """Publishes everything that is still queued."""
+        for repo_path in list(self._pending):
+            self._publish(repo_path)
+
+    def _publish(self, repo_path):
+        if commit_and_push_updates(repo_path, self._paths[repo_path], push_timeout=self.push_timeout):
+            del self._pending[repo_path]
+            del self._paths[repo_path]
+        else:
+            # Try again after another full window instead of on every poll.
+            self._pending[repo_path] = time.monotonic()
 
 
 # ==============================================================================
 # SECTION 5: MAIN EXECUTION LOGIC
 # ==============================================================================
 
-def main():
-    """Main function to run the entire pipeline."""
-    parser = argparse.ArgumentParser(description="AIO TimeGuessr Dashboard Generator for Synology Chat.")
-    action_group = parser.add_mutually_exclusive_group(required=True)
-    action_group.add_argument("--init", action="store_true", help="Initialize and download the full channel history for all configured channels.")
-    action_group.add_argument("--update", action="store_true", help="Update the channel archives with new messages for all configured channels.")
-    parser.add_argument("--out", type=str, default=DEFAULT_HTML_OUTPUT, help="The full path for the output HTML file.")
-    args = parser.parse_args()
+def update_all_channel_scores(state, sync_results, executor=None, stores=None):
+    """
+    Brings the score state up to date with every configured channel. `stores` may hold already
+    open post stores by channel ID. Channels whose sync already parsed the full history, and every
+    channel when a process pool `executor` is given, are parsed first and merged together through
+    update_channel_scores; the others are streamed together through update_merged_channel_scores.
+    The player days with edited or deleted posts are re-derived last. Returns the number of score records added, replaced or removed.
+    """
+    channel_stores = stores or {channel_id: open_post_store(channel_id) for channel_id in CHANNEL_IDS}
+    try:
+        streamed, parsed = {}, {}
+        for channel_id in CHANNEL_IDS:
+            if executor is None and sync_results.get(channel_id) is None:
+                streamed[channel_id] = channel_stores[channel_id]
+            else:
+                parsed[channel_id] = channel_stores[channel_id]
+        merged = update_channel_scores(state, parsed, sync_results, executor=executor)
+        merged += update_merged_channel_scores(state, streamed)
+        return merged + rescore_queued_days(state, channel_stores)
+    finally:
+        if not stores:
+            for store in channel_stores.values():
+                store.close()
 
-    all_posts = []
-    # Loop through each configured channel ID
-    for channel_id in CHANNEL_IDS:
-        print(f"\n{'='*20} Processing Channel ID: {channel_id} {'='*20}")
-        channel_posts = []
-        if args.init:
-            channel_posts = download_full_channel_history(channel_id)
-        elif args.update:
-            channel_posts = update_channel_history(channel_id)
-        all_posts.extend(channel_posts)
-    
-    if not all_posts:
-        print("\nNo posts found or fetched across all channels. Cannot generate dashboard.")
-        return
+def get_game_output_path(out_path, game):
+    """Returns where a game's dashboard goes: `out_path` itself for DEFAULT_GAME, '<stem>-<game><ext>' next to it otherwise."""
+    if game == DEFAULT_GAME:
+        return out_path
+    stem, ext = os.path.splitext(out_path)
+    return f"{stem}-{game}{ext or '.html'}"
 
-    # Sort all collected posts by creation time to ensure correct processing order
-    all_posts.sort(key=lambda p: p.get('create_at', 0))
+def write_game_dashboard(args, state, game):
+    """Builds one game's dashboard and writes it, leaving unchanged files untouched. Returns the paths that changed."""
+    out_path = get_game_output_path(args.out, game.key)
+    processed_count = get_score_record_count(state, game.key)
+    print(f"[{game.title}] Successfully processed {processed_count} valid entries (first score of the day per player).")
+    if not processed_count:
+        print(f"\nNo valid {game.title} entries to process. Cannot generate its dashboard.")
+        return []
 
-    processed_scores = process_timeguessr_scores(all_posts)
-    if not processed_scores:
-        print("\nNo valid TimeGuessr entries to process. Cannot generate dashboard.")
-        return
+    with METRICS.stage("build_payload", game=game.key):
+        player_data = create_player_data(state, game.key)
+        payload = build_dashboard_payload(player_data, args.data_format, state, game.key)
+    print(f"\nGenerating final {game.title} HTML dashboard...")
 
-    player_data = create_player_data(processed_scores)
-    
-    print("\nGenerating final HTML dashboard...")
-    html_content = generate_html(player_data)
-    
+    with METRICS.stage("render_output", game=game.key):
+        if args.split_data:
+            written = write_split_dashboard(out_path, payload, precompress=args.precompress, game=game.key, offline=args.offline)
+            print(f"✅ Successfully generated dashboard shell and data: '{os.path.abspath(out_path)}' ({len(written)} file(s) changed)")
+        else:
+            written = [out_path] if write_if_changed(out_path, generate_html(payload, game=game.key, offline=args.offline)) else []
+            print(f"✅ Successfully generated dashboard: '{os.path.abspath(out_path)}'")
+    for path in written:
+        if os.path.exists(path):
+            METRICS.set("output_bytes", os.path.getsize(path), file=os.path.basename(path))
+    METRICS.count("output_files_written_total", len(written), game=game.key)
+    return written
+
+def write_dashboard(args, state, publisher):
+    """
+    Builds the dashboard of every registered game from the score state and writes them next to args.out.
+    If anything changed, the output repository is queued on `publisher` for a single git commit and push.
+    """
+    written = []
     try:
         output_dir = os.path.dirname(args.out)
         if output_dir and not os.path.exists(output_dir):
             os.makedirs(output_dir)
             print(f"Created directory: {output_dir}")
 
-        with open(args.out, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        print(f"✅ Successfully generated dashboard: '{os.path.abspath(args.out)}'")
+        if args.offline:
+            written.extend(write_vendor_scripts(os.path.dirname(os.path.abspath(args.out))))
+        for game in GAMES.values():
+            written.extend(write_game_dashboard(args, state, game))
+    except IOError as e:
+        print(f"Error writing to file '{args.out}': {e}")
+        return
+    if not written:
+        print("The dashboards are unchanged. Nothing to publish.")
+        return
+
+    # --- GIT PUSH LOGIC ---
+    repo_dir = os.path.dirname(os.path.abspath(args.out))
+    # Check if the target folder name is part of the output path
+    if GIT_REPO_FOLDER_NAME in repo_dir.split(os.sep):
+        publisher.submit(repo_dir, [os.path.abspath(path) for path in written])
+    else:
+        print(f"\nSkipping git push. Output directory '{repo_dir}' does not seem to be the correct repository.")
+        print(f"(Looking for a path containing '{GIT_REPO_FOLDER_NAME}')")
+
+def watch_channels(args, state, publisher, executor=None):
+    """
+    Stays resident and polls every channel for new posts, keeping the post stores and score state open.
+    The dashboards are only regenerated when a new valid game result appears. Each idle poll doubles
+    the interval (up to --watch-max-interval); new posts bring it back to --watch-interval.
+    Queued git publishes are made between polls, once their --publish-window has elapsed.
+    """
+    stores = {channel_id: open_post_store(channel_id, check_same_thread=False) for channel_id in CHANNEL_IDS}
+    interval = args.watch_interval
+    print(f"\n{'='*20} Watching Channels: {', '.join(map(str, CHANNEL_IDS))} (Ctrl+C to stop) {'='*20}")
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(args.fetch_threads, len(CHANNEL_IDS)))) as pool:
+            next_poll = time.monotonic() + interval
+            while True:
+                # A publish falls between two polls; it does not push the next poll back.
+                poll_in = next_poll - time.monotonic()
+                publish_in = publisher.seconds_until_due()
+                if publish_in is not None and publish_in < poll_in:
+                    time.sleep(publish_in)
+                    publisher.publish_due()
+                    continue
+                time.sleep(max(0.0, poll_in))
+                futures = {channel_id: pool.submit(poll_channel, channel_id, stores[channel_id]) for channel_id in CHANNEL_IDS}
+                found_new, sync_results = False, {}
+                for channel_id, future in futures.items():
+                    try:
+                        has_new, sync_results[channel_id] = future.result()
+                        found_new = found_new or has_new
+                    except ChatAuthError as e:
+                        # Polling on with rejected credentials would only hammer the server.
+                        print(f"[channel {channel_id}] Authentication failed: {e} Update SYNO_TOKEN and COOKIE_STRING. Stopping.")
+                        raise
+                    except Exception as e:
+                        print(f"[channel {channel_id}] Poll failed: {e}")
+
+                interval = args.watch_interval if found_new else min(interval * 2, args.watch_max_interval)
+                next_poll = time.monotonic() + interval
+                if not found_new:
+                    continue
+
+                if update_all_channel_scores(state, sync_results, executor=executor, stores=stores):
+                    print(f"\n[{datetime.now():%H:%M:%S}] New result(s) found. Regenerating the dashboards.")
+                    write_dashboard(args, state, publisher)
+                    if args.metrics_file:
+                        METRICS.write(args.metrics_file, args.metrics_format)
+                else:
+                    print(f"[{datetime.now():%H:%M:%S}] New posts, but no new game result.")
+    finally:
+        for store in stores.values():
+            store.close()
+
+def main():
+    """Main function to run the entire pipeline."""
+    parser = argparse.ArgumentParser(description="AIO daily game (TimeGuessr, ...) Dashboard Generator for Synology Chat.")
+    action_group = parser.add_mutually_exclusive_group(required=True)
+    action_group.add_argument("--init", action="store_true", help="Initialize and download the full channel history for all configured channels.")
+    action_group.add_argument("--update", action="store_true", help="Update the channel archives with new messages for all configured channels.")
+    action_group.add_argument("--watch", action="store_true", help="Update once, then keep running and regenerate the dashboard whenever a new result is posted.")
+    parser.add_argument("--out", type=str, default=DEFAULT_HTML_OUTPUT, help="The full path for the output HTML file.")
+    parser.add_argument("--split-data", action="store_true", help="Write a static HTML shell plus a separate, content-hashed data file instead of one self-contained page.")
+    parser.add_argument("--data-format", choices=['columnar', 'json'], default=DEFAULT_DATA_FORMAT, help="Encoding of the dashboard data: compact 'columnar' arrays or the plain 'json' object.")
+    parser.add_argument("--offline", action="store_true", help="Write a self-contained page that needs no network: only the CSS it uses, inlined, Chart.js from vendor/ and system fonts.")
+    parser.add_argument("--precompress", action="store_true", help="With --split-data, also write .gz (and .br if the brotli package is installed) copies of the data file.")
+    parser.add_argument("--fetch-threads", type=int, default=FETCH_THREADS, help="How many channels to fetch in parallel.")
+    parser.add_argument("--rate-limit", type=float, default=MAX_REQUESTS_PER_SECOND, help="Maximum API requests per second across all channels (0 disables the limit).")
+    parser.add_argument("--rescan-hours", type=float, default=SYNC_RESCAN_HOURS, help="How far back before the newest synced post an update re-checks for edited and deleted messages (0 disables).")
+    parser.add_argument("--compact-store", action="store_true", help="Convert the channel stores to the compact layout (no raw payloads, messages that are no game share compressed in a sidecar).")
+    parser.add_argument("--rebuild", action="store_true", help="Discard the saved score state and reparse every stored post (use after changing the parsing rules).")
+    parser.add_argument("--workers", type=int, default=1, help="Parse stored posts with this many processes (useful with --rebuild on large archives).")
+    parser.add_argument("--watch-interval", type=float, default=WATCH_MIN_INTERVAL, help="With --watch, seconds between polls while the channels are active.")
+    parser.add_argument("--watch-max-interval", type=float, default=WATCH_MAX_INTERVAL, help="With --watch, the longest poll interval reached while the channels are idle.")
+    parser.add_argument("--publish-window", type=float, default=GIT_PUBLISH_WINDOW, help="With --watch, seconds to collect dashboard updates into a single git commit and push.")
+    parser.add_argument("--push-timeout", type=float, default=GIT_PUSH_TIMEOUT, help="Seconds before a hanging git push is abandoned and retried.")
+    parser.add_argument("--metrics-file", type=str, help="Write per-stage timings and counters (API calls, bytes, posts scanned/matched, output size, git time) to this file.")
+    parser.add_argument("--metrics-format", choices=['jsonl', 'prometheus'], default='jsonl', help="Append JSON lines, or overwrite the file in the Prometheus text format.")
+    parser.add_argument("--profile", action="store_true", help="Run under cProfile and tracemalloc and print the top functions and allocation sites.")
+    args = parser.parse_args()
 
-        # --- GIT PUSH LOGIC ---
-        repo_dir = os.path.dirname(os.path.abspath(args.out))
-        # Check if the target folder name is part of the output path
-        if GIT_REPO_FOLDER_NAME in repo_dir.split(os.sep):
-            commit_and_push_updates(repo_path=repo_dir)
+    try:
+        if args.profile:
+            run_profiled(run_pipeline, args)
         else:
-            print(f"\nSkipping git push. Output directory '{repo_dir}' does not seem to be the correct repository.")
-            print(f"(Looking for a path containing '{GIT_REPO_FOLDER_NAME}')")
+            run_pipeline(args)
+    except ChatAuthError:
+        raise SystemExit(1)  # The reason has been printed; a non-zero exit lets cron notice.
 
-    except IOError as e:
-        print(f"Error writing to file '{args.out}': {e}")
+def run_pipeline(args):
+    """Synchronises the channels, updates the scores and writes the dashboard, then keeps watching with --watch."""
+    global API_RATE_LIMITER, COMPACT_POST_STORE, SYNC_RESCAN_HOURS
+    API_RATE_LIMITER = RateLimiter(args.rate_limit)
+    SYNC_RESCAN_HOURS = args.rescan_hours
+    COMPACT_POST_STORE = COMPACT_POST_STORE or args.compact_store
+
+    print(f"\n{'='*20} Synchronising Channels: {', '.join(map(str, CHANNEL_IDS))} {'='*20}")
+    sync_results = sync_all_channels(CHANNEL_IDS, full_download=args.init, max_threads=args.fetch_threads)
+
+    print(f"\nProcessing {', '.join(game.title for game in GAMES.values())} data from all channels...")
+    state = open_score_state(rebuild=args.rebuild)
+    executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    # One-shot runs publish right away; only --watch collects updates over a window.
+    publisher = PublishQueue(window=args.publish_window if args.watch else 0, push_timeout=args.push_timeout)
+    try:
+        update_all_channel_scores(state, sync_results, executor=executor)
+        write_dashboard(args, state, publisher)
+        if args.watch:
+            watch_channels(args, state, publisher, executor=executor)
+        publisher.flush()
+    except (KeyboardInterrupt, ChatAuthError) as e:
+        print("\nStopped. Publishing queued updates...")
+        publisher.flush()
+        if isinstance(e, ChatAuthError):
+            raise
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        state.close()
+        METRICS.print_summary()
+        if args.metrics_file:
+            METRICS.write(args.metrics_file, args.metrics_format)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()